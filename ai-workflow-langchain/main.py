@@ -1,14 +1,74 @@
 import streamlit as st
 import os
+import asyncio
+import threading
 from langchain.agents import load_tools
-from langchain.agents import initialize_agent
+from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_cerebras import ChatCerebras
-import io
-import re
-import contextlib
-
-# Add tracing in LangSmith
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.prompts import ChatPromptTemplate
+
+# Prompt for the tool-calling agent, the scratchpad holds the tool calls and their results
+prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant. Use the search tools to find up-to-date information. When several lookups are independent, request them together in one step."),
+    ("human", "{input}"),
+    ("placeholder", "{agent_scratchpad}"),
+])
+
+# HTML templates for each step of the agent's output
+TEMPLATES = {
+    "Action:": "<div style='background-color: #e8f4f8; padding: 10px; border-radius: 5px;'><b>Action:</b> {}</div>",
+    "Action Input:": "<div style='background-color: #f4f8e8; padding: 10px; border-radius: 5px;'><b>Action Input:</b> {}</div>",
+    "Observation:": "<div style='background-color: #fff3cd; padding: 10px; border-radius: 5px;'><b>Observation:</b> {}</div>",
+    "Final Answer:": "<div style='background-color: #d4edda; padding: 10px; border-radius: 5px;'><b>Answer:</b> {}</div>",
+}
+
+class HTMLStepHandler(BaseCallbackHandler):
+    """Collects the agent's steps as HTML blocks while it runs."""
+
+    # Run in the event loop rather than a worker thread so the steps keep their order
+    run_inline = True
+
+    def __init__(self):
+        self.parts = []
+
+    def on_agent_action(self, action, **kwargs):
+        self.parts.append(TEMPLATES["Action:"].format(action.tool))
+        self.parts.append(TEMPLATES["Action Input:"].format(action.tool_input))
+
+    def on_tool_end(self, output, **kwargs):
+        self.parts.append(TEMPLATES["Observation:"].format(output))
+
+    def on_agent_finish(self, finish, **kwargs):
+        self.parts.append(TEMPLATES["Final Answer:"].format(finish.return_values["output"]))
+
+# Initialize llm once per API key and model so its HTTP client is reused
+@st.cache_resource
+def get_chat_cerebras(api_key, model):
+    return ChatCerebras(model=model, api_key=api_key)
+
+# One event loop for the whole process, running in a background thread. The LLM's
+# async HTTP client keeps its pooled connections tied to the loop that opened them,
+# so every query has to run on this loop instead of a new one from asyncio.run
+@st.cache_resource
+def get_event_loop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+async def warm_up(llm):
+    """Sends a 1-token request so the connection is already open when the first query arrives."""
+    try:
+        # Async, like the queries, so it opens a connection in the pool they use
+        await llm.bind(max_tokens=1).ainvoke("hi")
+    except Exception:
+        # A failed warm-up only costs us the head start, the real request reports any error
+        pass
+
+# Load tools once per process instead of on every rerun
+@st.cache_resource
+def get_tools(tool_names):
+    return load_tools(list(tool_names))
 
 # Start of Streamlit Application
 st.title("A Daily Dose of LLM 📰")
@@ -18,17 +78,25 @@ with st.sidebar:
     st.title("Settings")
     st.markdown("### :red[Enter your Cerebras API Key below]")
     api_key = st.text_input("Cerebras API Key:", type="password")
-    st.markdown("### :red[Enter your LangChain API Key below]")
+    st.markdown("### Enter your LangChain API Key below (optional, enables LangSmith tracing)")
     os.environ["LANGCHAIN_API_KEY"] = st.text_input("LangChain API Key:", type="password")
 
-if not api_key or not os.environ["LANGCHAIN_API_KEY"]:
+# Add tracing in LangSmith only when a LangChain API Key is provided
+if os.environ["LANGCHAIN_API_KEY"]:
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    # Upload traces in the background so they don't hold up the response
+    os.environ["LANGCHAIN_CALLBACKS_BACKGROUND"] = "true"
+else:
+    os.environ.pop("LANGCHAIN_TRACING_V2", None)
+
+if not api_key:
     st.markdown("""
     ## Welcome to Cerebras x LangChain Agentic Workflow Demo!
 
     Needed a summary of today's news? You probably headed to Google to search, not your average LLM. This bot is different, however, it can search the internet *for you*! This app implements LangChain's tool-calling agent to interact with Cerebras API. 
                 
     To get started:
-    1. :red[Enter your Cerebras and LangChain API Keys in the sidebar.]
+    1. :red[Enter your Cerebras API Key in the sidebar.] Add a LangChain API Key too if you want to trace the agent in LangSmith.
     2. Ask the bot for something you want the latest update of, such as today's news report.
     3. Lay back, relax, and read a summary of the news.
 
@@ -37,50 +105,40 @@ if not api_key or not os.environ["LANGCHAIN_API_KEY"]:
     st.stop()
 
 
+# Warm up the connection in the background while the user types, once per API key
+if st.session_state.get("warmed") != api_key:
+    asyncio.run_coroutine_threadsafe(warm_up(get_chat_cerebras(api_key, "llama3.1-70b")), get_event_loop())
+    st.session_state.warmed = api_key
+
 user_input = st.text_input("")
 st.info("ex: What is the latest update on the US Presidential Election?")
 
 if st.button("Generate output"):
     if user_input:
-        # Initialize llm
-        llm = ChatCerebras(model="llama3.1-70b", api_key=api_key)
-        # Load tools
-        tools = load_tools(["ddg-search", "wikipedia"], llm=llm)
-
-        agent = initialize_agent(tools,
-                                llm,
-                                agent="zero-shot-react-description",
-                                verbose=True)
-
-        # Capture the verbose output in a StringIO buffer
-        output_buffer = io.StringIO()
-        with contextlib.redirect_stdout(output_buffer):
-            with st.spinner(text="Generating result..."):
-                result = agent.run(
-                    user_input
-                )
-
-         # Get the verbose output
-        verbose_output = output_buffer.getvalue()
-
-        # Remove ANSI escape sequences from the verbose output
-        ansi_escape = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
-        verbose_output = ansi_escape.sub('', verbose_output)
-
-        # Format the verbose output into HTML
-        formatted_output = ""
-        lines = verbose_output.splitlines()
-        for line in lines:
-            if "Thought:" in line:
-                formatted_output += f"<div style='background-color: #f8f9fa; padding: 10px; border-radius: 5px;'><b>Thought:</b> {line.replace('Thought:', '').strip()}</div>"
-            elif "Action:" in line:
-                formatted_output += f"<div style='background-color: #e8f4f8; padding: 10px; border-radius: 5px;'><b>Action:</b> {line.replace('Action:', '').strip()}</div>"
-            elif "Action Input:" in line:
-                formatted_output += f"<div style='background-color: #f4f8e8; padding: 10px; border-radius: 5px;'><b>Action Input:</b> {line.replace('Action Input:', '').strip()}</div>"
-            elif "Observation:" in line:
-                formatted_output += f"<div style='background-color: #fff3cd; padding: 10px; border-radius: 5px;'><b>Observation:</b> {line.replace('Observation:', '').strip()}</div>"
-            elif "Final Answer:" in line:
-                formatted_output += f"<div style='background-color: #d4edda; padding: 10px; border-radius: 5px;'><b>Answer:</b> {line.replace('Answer:', '').strip()}</div></div>"
+        model = "llama3.1-70b"
+
+        # Build the agent once and reuse it until the API key or model changes
+        if "agent" not in st.session_state or st.session_state.get("agent_key") != (api_key, model):
+            # Initialize llm
+            llm = get_chat_cerebras(api_key, model)
+            # Load tools
+            tools = get_tools(("ddg-search", "wikipedia"))
+
+            agent = create_tool_calling_agent(llm, tools, prompt)
+            st.session_state.agent = AgentExecutor(agent=agent, tools=tools)
+            st.session_state.agent_key = (api_key, model)
+        agent = st.session_state.agent
+
+        # Collect each step of the agent as HTML through a callback handler.
+        # Running asynchronously lets the executor dispatch independent tool calls concurrently.
+        handler = HTMLStepHandler()
+        with st.spinner(text="Generating result..."):
+            result = asyncio.run_coroutine_threadsafe(
+                agent.ainvoke({"input": user_input}, config={"callbacks": [handler]}),
+                get_event_loop(),
+            ).result()["output"]
+
+        formatted_output = "".join(handler.parts)
 
         # Display results
         st.subheader("Verbose Output (Step-by-Step):")
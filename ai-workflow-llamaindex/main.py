@@ -3,12 +3,63 @@ import llama_index.core
 from llama_index.core.agent import ReActAgent
 from llama_index.llms.cerebras import Cerebras
 from llama_index.core.tools import FunctionTool
-import io
-import contextlib
+from llama_index.core.callbacks import CallbackManager, CBEventType, EventPayload
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
 import re
 import webbrowser
 import os
 
+# Matches the ReAct tags at the start of each line of the LLM's reasoning, capturing the tag and the text after it
+TAG_RE = re.compile(r'(Thought:|Action:|Action Input:|Answer:)\s*(.*)')
+
+# HTML templates for each step of the agent's output
+TEMPLATES = {
+    "Step start": "<div style='margin-bottom: 15px;'><p><b>Step input:</b> {}</p>",
+    "Step end": "</div>",
+    "Thought:": "<div style='background-color: #f8f9fa; padding: 10px; border-radius: 5px;'><b>Thought:</b> {}</div>",
+    "Action:": "<div style='background-color: #e8f4f8; padding: 10px; border-radius: 5px;'><b>Action:</b> {}</div>",
+    "Action Input:": "<div style='background-color: #f4f8e8; padding: 10px; border-radius: 5px;'><b>Action Input:</b> {}</div>",
+    "Observation:": "<div style='background-color: #fff3cd; padding: 10px; border-radius: 5px;'><b>Observation:</b> {}</div>",
+    "Answer:": "<div style='background-color: #d4edda; padding: 10px; border-radius: 5px;'><b>Answer:</b> {}</div>",
+}
+
+class HTMLStepHandler(BaseCallbackHandler):
+    """Collects the agent's steps as HTML blocks while it runs."""
+
+    def __init__(self):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self.parts = []
+
+    def on_event_start(self, event_type, payload=None, event_id="", parent_id="", **kwargs):
+        if event_type == CBEventType.AGENT_STEP and payload:
+            self.parts.append(TEMPLATES["Step start"].format(payload[EventPayload.MESSAGES][0]))
+        return event_id
+
+    def on_event_end(self, event_type, payload=None, event_id="", **kwargs):
+        if event_type == CBEventType.AGENT_STEP:
+            self.parts.append(TEMPLATES["Step end"])
+        elif event_type == CBEventType.LLM and payload:
+            # The reasoning comes back as "Thought: ...", then "Action: ..." and "Action Input: ..." or "Answer: ..."
+            response = payload.get(EventPayload.RESPONSE) or payload.get(EventPayload.COMPLETION)
+            text = response.message.content if hasattr(response, "message") else response.text
+            for line in text.splitlines():
+                match = TAG_RE.match(line.strip())
+                if match:
+                    self.parts.append(TEMPLATES[match.group(1)].format(match.group(2).strip()))
+        elif event_type == CBEventType.FUNCTION_CALL and payload:
+            self.parts.append(TEMPLATES["Observation:"].format(payload[EventPayload.FUNCTION_OUTPUT]))
+
+    def start_trace(self, trace_id=None):
+        pass
+
+    def end_trace(self, trace_id=None, trace_map=None):
+        pass
+
+# Initialize llm once per API key and model so its HTTP client is reused
+@st.cache_resource
+def get_cerebras_llm(api_key, model):
+    return Cerebras(model=model, api_key=api_key)
+
 # Start of Streamlit Application
 st.title("AlienMath 🧮👽")
 
@@ -45,57 +96,40 @@ def poof(a: float, b: float) -> float:
     """Poofs two numbers and returns the product of the two numbers and 3"""
     return a * b * 3
 
-poof_tool = FunctionTool.from_defaults(fn=poof)
-
 def shoop(a: float, b: float) -> float:
     """Shoops two numbers and returns the sum of the two numbers and 3"""
     return a + b + 3
 
-shoop_tool = FunctionTool.from_defaults(fn=shoop)
+# Wrap the functions as tools once per process, since this introspects their signatures
+@st.cache_resource
+def get_tools():
+    return [FunctionTool.from_defaults(fn=poof), FunctionTool.from_defaults(fn=shoop)]
 
 user = st.text_input("")
 st.info("ex: What is 2 shoop 3 poof 1 shoop 4?")
 
 if st.button("Generate output"):
     if user:
-        llm = Cerebras(model="llama3.1-70b", api_key=api_key)
-        agent = ReActAgent.from_tools([poof_tool, shoop_tool], llm=llm, verbose=True, max_iterations=100)
-
-        # Capture the verbose output in a StringIO buffer
-        output_buffer = io.StringIO()
-        with contextlib.redirect_stdout(output_buffer):
-            with st.spinner(text="Generating result..."):
-                response = agent.chat(user + " Use a tool to calculate every step.")
-
-        # Get the verbose output
-        verbose_output = output_buffer.getvalue()
-
-        # Remove ANSI escape sequences from the verbose output
-        ansi_escape = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
-        verbose_output = ansi_escape.sub('', verbose_output)
-
-        # Format the verbose output into HTML
-        formatted_output = ""
-        lines = verbose_output.splitlines()
-        for line in lines:
-            if line.startswith("> Running step"):
-                formatted_output += f"<div style='margin-bottom: 15px;'><p><b>{line}</b></p>"
-            elif "Step input:" in line:
-                formatted_output += f"<p><b>Step input:</b> {line.replace('Step input:', '').strip()}</p>"
-            elif "Thought:" in line:
-                formatted_output += f"<div style='background-color: #f8f9fa; padding: 10px; border-radius: 5px;'><b>Thought:</b> {line.replace('Thought:', '').strip()}</div>"
-            elif "Action:" in line:
-                formatted_output += f"<div style='background-color: #e8f4f8; padding: 10px; border-radius: 5px;'><b>Action:</b> {line.replace('Action:', '').strip()}</div>"
-            elif "Action Input:" in line:
-                formatted_output += f"<div style='background-color: #f4f8e8; padding: 10px; border-radius: 5px;'><b>Action Input:</b> {line.replace('Action Input:', '').strip()}</div>"
-            elif "Observation:" in line:
-                formatted_output += f"<div style='background-color: #fff3cd; padding: 10px; border-radius: 5px;'><b>Observation:</b> {line.replace('Observation:', '').strip()}</div>"
-            elif "Answer:" in line:
-                formatted_output += f"<div style='background-color: #d4edda; padding: 10px; border-radius: 5px;'><b>Answer:</b> {line.replace('Answer:', '').strip()}</div></div>"
-            elif line.strip():  # To catch the "Step input: None" cases
-                formatted_output += f"<p style='margin-bottom: 15px;'><b>{line}</b></p>"
-            else:
-                formatted_output += f"{line}<br>"
+        model = "llama3.1-70b"
+
+        # Build the agent once and reuse it until the API key or model changes.
+        # Its callback handler collects each step of the agent as HTML.
+        if "agent" not in st.session_state or st.session_state.get("agent_key") != (api_key, model):
+            llm = get_cerebras_llm(api_key, model)
+            st.session_state.handler = HTMLStepHandler()
+            st.session_state.agent = ReActAgent.from_tools(get_tools(), llm=llm, max_iterations=100, callback_manager=CallbackManager([st.session_state.handler]))
+            st.session_state.agent_key = (api_key, model)
+        agent = st.session_state.agent
+        handler = st.session_state.handler
+
+        # Start every question from a clean slate
+        agent.reset()
+        handler.parts = []
+
+        with st.spinner(text="Generating result..."):
+            response = agent.chat(user + " Use a tool to calculate every step.")
+
+        formatted_output = "".join(handler.parts)
 
         # Display results
         st.subheader("Verbose Output (Step-by-Step):")
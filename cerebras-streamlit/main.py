@@ -1,9 +1,40 @@
 import streamlit as st
 from cerebras.cloud.sdk import Cerebras
-import webbrowser
+import threading
+from collections import OrderedDict
 
 repl_link = "https://replit.com/@EmilyChen10/AI-Agentic-Workflow-Example-with-LlamaIndex-V2#main.py"
 
+# Sent verbatim as the first message of every request so the provider can reuse its cached prefix.
+# Keep per-turn details (timestamps, user ids, ...) out of it.
+SYSTEM_PROMPT = "You are a helpful, friendly assistant powered by Cerebras. Answer clearly and concisely, using Markdown where it helps readability."
+
+# Maximum number of answers kept in the answer cache
+ANSWER_CACHE_SIZE = 256
+
+# Initialize Cerebras client
+@st.cache_resource
+def get_cerebras_client(api_key):
+    return Cerebras(api_key=api_key)
+
+# Answers to first prompts, shared by every session in the process. Only a first prompt
+# can repeat exactly, later turns are sent with the whole conversation before them.
+@st.cache_resource
+def get_answer_cache():
+    return OrderedDict(), threading.Lock()
+
+def warm_up(client, model):
+    """Sends a 1-token request so the connection is already open when the first prompt arrives."""
+    try:
+        client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": "hi"}],
+            max_tokens=1
+        )
+    except Exception:
+        # A failed warm-up only costs us the head start, the real request reports any error
+        pass
+
 st.set_page_config(page_icon="🤖", layout="wide",
        page_title="Cerebras")
 
@@ -19,8 +50,7 @@ st.title("Cerebras")
 st.subheader("Deploying Cerebras on Streamlit", divider="orange", anchor=False)
 
 with st.sidebar:
-    if st.button('Spin up your own on Repl.it :material/code:', type='secondary'):
-        webbrowser.open(repl_link)
+    st.link_button('Spin up your own on Repl.it :material/code:', repl_link, type='secondary')
     st.title("Settings")
     st.markdown("### :red[Enter your Cerebras API Key below]")
     api_key = st.text_input("Cerebras API Key:", type="password")
@@ -38,11 +68,8 @@ if not api_key:
     """)
     st.stop()
     
-# Create the Cerebras client
-client = Cerebras(
-    # This is the default and can be omitted
-    api_key=api_key,
-)
+# Reuse the Cerebras client (and its connection pool) across reruns
+client = get_cerebras_client(api_key)
 
 # Initialize chat history and selected model
 if "messages" not in st.session_state:
@@ -72,6 +99,11 @@ if st.session_state.selected_model != model_option:
     st.session_state.messages = []
     st.session_state.selected_model = model_option
 
+# Warm up the connection in the background, once per API key and model
+if st.session_state.get("warmed") != (api_key, model_option):
+    threading.Thread(target=warm_up, args=(client, model_option), daemon=True).start()
+    st.session_state.warmed = (api_key, model_option)
+
 max_tokens_range = models[model_option]["tokens"]
 
 with col2:
@@ -97,23 +129,51 @@ if prompt := st.chat_input("Enter your prompt here..."):
     with st.chat_message("user", avatar='🦔'):
         st.markdown(prompt)
 
+    # Reuse the answer if this first prompt was already sent to the model with the same API key and settings
+    answer_cache, answer_cache_lock = get_answer_cache()
+    cache_key = None
+    response = None
+    if len(st.session_state.messages) == 1:
+        cache_key = (api_key, model_option, max_tokens, prompt)
+        with answer_cache_lock:
+            response = answer_cache.get(cache_key)
+            if response is not None:
+                answer_cache.move_to_end(cache_key)
+    if response is not None:
+        with st.chat_message("assistant", avatar="🤖"):
+            st.markdown(response)
+        st.session_state.messages.append(
+            {"role": "assistant", "content": response})
+        st.stop()
+
     # Fetch response from Cerebras API
     try:
-        chat_completion = client.chat.completions.create(
+        stream = client.chat.completions.create(
             model=model_option,
+            # Send the whole append-only history so earlier turns stay a cacheable prefix
             messages=[
-                {"role": "user", 
-                 "content": prompt}
+                {"role": "system",
+                 "content": SYSTEM_PROMPT},
+                *st.session_state.messages
             ],
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            stream=True
         )
 
-        # Display response from Cerebras API
+        # Display response from Cerebras API as the tokens arrive
         with st.chat_message("assistant", avatar="🤖"):
-            response = chat_completion.choices[0].message.content
+            response = st.write_stream(
+                chunk.choices[0].delta.content or ""
+                for chunk in stream
+                if chunk.choices
+            )
             # Save response to chat history
             st.session_state.messages.append(
                 {"role": "assistant", "content": response})
-            st.markdown(response)
+        if cache_key is not None:
+            with answer_cache_lock:
+                answer_cache[cache_key] = response
+                if len(answer_cache) > ANSWER_CACHE_SIZE:
+                    answer_cache.popitem(last=False)
     except Exception as e:
         st.error(e, icon="🚨")
\ No newline at end of file
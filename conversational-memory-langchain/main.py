@@ -1,40 +1,44 @@
 import streamlit as st
-import webbrowser
-from langchain.chains import LLMChain
 from langchain_core.prompts import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
     MessagesPlaceholder,
 )
 from langchain_core.messages import SystemMessage
-from langchain.chains.conversation.memory import ConversationBufferWindowMemory
+from langchain.memory import ConversationTokenBufferMemory
 from langchain_cerebras import ChatCerebras
 
+repl_link = "https://replit.com/@EmilyChen10/Chatbot-with-Conversational-Memory-on-LangChain#main.py"
+
+models = ["llama3.1-8b", "llama3.1-70b"]
+system_prompt = 'You are a friendly conversational chatbot'
+conversational_memory_tokens = 2048 # number of tokens of previous messages the chatbot will remember during the conversation
+
+@st.cache_resource
+def get_chat_cerebras(api_key, model):
+    """
+    Returns a ChatCerebras object for the given API key and model, shared across reruns so its HTTP client is reused.
+    """
+    return ChatCerebras(api_key=api_key, model=model)
+
 def main():
     """
     This is the main entry point of the application. It initializes our custom LLM object and handles interaction with the user.
     """
-    
-    repl_link = "https://replit.com/@EmilyChen10/Chatbot-with-Conversational-Memory-on-LangChain#main.py"
-    
+
     st.title("HyperthymesiaBot")
 
     with st.sidebar:
-        if st.button('Spin up your own on Repl.it :material/code:', type='secondary'):
-            webbrowser.open(repl_link)
+        st.link_button('Spin up your own on Repl.it :material/code:', repl_link, type='secondary')
         st.title("Settings")
         st.markdown("### :red[Enter your Cerebras API Key below]")
         api_key = st.text_input("Cerebras API Key:", type="password")
 
-    models = ["llama3.1-8b", "llama3.1-70b"]
-    system_prompt = 'You are a friendly conversational chatbot'
-    conversational_memory_length = 5 # number of previous messages the chatbot will remember during the conversation
-
     if not api_key:
         st.markdown("""
         ## Welcome to Cerebras x LangChain Demo!
     
-        This simple chatbot app can remember up to 5 previous messages (it has conversational memory!) and uses the Cerebras API to generate responses.
+        This simple chatbot app can remember the last 2048 tokens of your conversation (it has conversational memory!) and uses the Cerebras API to generate responses.
     
         To get started:
         1. :red[Enter your Cerebras API Key in the sidebar.]
@@ -51,12 +55,15 @@ def main():
         options=models
     )
 
-    # Initialize history and chatbot memory
+    # Initialize the Cerebras LLM object
+    cerebras_llm = get_chat_cerebras(api_key, model_option)
+
+    # Initialize history and chatbot memory. The memory is capped by tokens rather than messages so long messages can't grow the prompt without bound.
     if 'history' not in st.session_state:
         st.session_state.history = []
 
     if 'memory' not in st.session_state:
-        st.session_state.memory = ConversationBufferWindowMemory(k=conversational_memory_length, memory_key="chat_history", return_messages=True)
+        st.session_state.memory = ConversationTokenBufferMemory(llm=cerebras_llm, max_token_limit=conversational_memory_tokens, memory_key="chat_history", return_messages=True)
 
     if "selected_model" not in st.session_state:
         st.session_state.selected_model = None
@@ -64,43 +71,45 @@ def main():
     # Detect model change and clear chat history if model has changed
     if st.session_state.selected_model != model_option:
         st.session_state.history = []
-        st.session_state.memory = ConversationBufferWindowMemory(k=conversational_memory_length, memory_key="chat_history", return_messages=True)
+        st.session_state.memory = ConversationTokenBufferMemory(llm=cerebras_llm, max_token_limit=conversational_memory_tokens, memory_key="chat_history", return_messages=True)
         st.session_state.selected_model = model_option
 
-    # Initialize the Cerebras LLM object
-    cerebras_llm = ChatCerebras(api_key=api_key, model=st.session_state.selected_model)
+    # Construct the chat prompt template once so the system prompt prefix stays identical across turns
+    if 'prompt' not in st.session_state:
+        st.session_state.prompt = ChatPromptTemplate.from_messages(
+            [
+                SystemMessage(
+                    content=system_prompt
+                ),  # This is the persistent system prompt that is always included at the start of the chat.
+
+                MessagesPlaceholder(
+                    variable_name="chat_history"
+                ),  # This placeholder will be replaced by the actual chat history during the conversation. It helps in maintaining context.
+
+                HumanMessagePromptTemplate.from_template(
+                    "{human_input}"
+                ),  # This template is where the user's current input will be injected into the prompt.
+            ]
+        )
 
     user_input = st.text_input("Let's talk:", "")
 
     if st.button("Send"):
         # If the user has asked a question,
         if user_input:
-            # Construct a chat prompt template using various components
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    SystemMessage(
-                        content=system_prompt
-                    ),  # This is the persistent system prompt that is always included at the start of the chat.
-
-                    MessagesPlaceholder(
-                        variable_name="chat_history"
-                    ),  # This placeholder will be replaced by the actual chat history during the conversation. It helps in maintaining context.
-
-                    HumanMessagePromptTemplate.from_template(
-                        "{human_input}"
-                    ),  # This template is where the user's current input will be injected into the prompt.
-                ]
+            # Fill the prompt with the remembered chat history and the user's current input
+            messages = st.session_state.prompt.format_messages(
+                chat_history=st.session_state.memory.load_memory_variables({})["chat_history"],
+                human_input=user_input,
             )
 
-            # Create a conversation chain using the LangChain LLM (Language Learning Model)
-            conversation = LLMChain(
-                llm=cerebras_llm,  # The Groq LangChain chat object initialized earlier.
-                prompt=prompt,  # The constructed prompt template.
-                verbose=False,   # TRUE Enables verbose output, which can be useful for debugging.
-                memory=st.session_state.memory,  # The conversational memory object that stores and manages the conversation history.
-            )
-            # The chatbot's answer is generated by sending the full prompt to the Groq API.
-            response = conversation.predict(human_input=user_input)
+            # The chatbot's answer is streamed from the Cerebras API as the tokens arrive.
+            placeholder = st.empty()
+            response = placeholder.write_stream(chunk.content for chunk in cerebras_llm.stream(messages))
+            placeholder.empty()
+
+            # Save the exchange to the conversational memory object that manages the conversation history.
+            st.session_state.memory.save_context({"human_input": user_input}, {"text": response})
 
             # Append the user's input and the chatbot's response to the conversation history
             st.session_state.history.append(f"User: {user_input}")
@@ -1,7 +1,8 @@
 # set CEREBRAS_API_KEY in the secrets
 
 import os
-from cerebras.cloud.sdk import Cerebras
+import asyncio
+from cerebras.cloud.sdk import AsyncCerebras, Cerebras
 
 # Create the Cerebras client
 client = Cerebras(
@@ -9,37 +10,84 @@ client = Cerebras(
     api_key=os.environ.get("CEREBRAS_API_KEY"),
 )
 
-# Initialize the chat history
-chat_history = []
 
-while True:
-    # Get user input from the console
-    user_input = input("User: ")
-    user_message = {"role": "user", "content": user_input}
-    
-    # Append the user input to the chat history
-    chat_history.append(user_message)
+async def run_batch(prompts, model="llama3.1-8b", api_key=None, concurrency=16):
+    """
+    Sends every prompt to the model concurrently and returns the responses in the same order.
+    At most `concurrency` requests are in flight at once to respect the provider's rate limits.
+    Duplicate prompts are only sent once and share the same response.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    async_client = AsyncCerebras(api_key=api_key or os.environ.get("CEREBRAS_API_KEY"))
 
-    response = client.chat.completions.create(
-    messages=[user_message],
-    model="llama3.1-8b",
-)
-    # Append the user's response to the chat history
-    chat_history.append({
-      "role": "assistant",
-      "content": response.choices[0].message.content
-  })
-    
-    # Display the response
-    print("Assistant:", response.choices[0].message.content)
-
-    # Extract values
-    total_tokens = response.usage.total_tokens
-    total_time = response.time_info.total_time
-
-    # Calculate tokens per second
-    tokens_per_second = total_tokens / total_time
-
-    # Display the tokens per second
-    print("(Tokens per second: " + str(tokens_per_second) + ")")
-    print("")
\ No newline at end of file
+    async def complete(prompt):
+        async with semaphore:
+            return await async_client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=model,
+            )
+
+    try:
+        unique_prompts = list(dict.fromkeys(prompts))
+        responses = dict(zip(unique_prompts, await asyncio.gather(*(complete(prompt) for prompt in unique_prompts))))
+        return [responses[prompt] for prompt in prompts]
+    finally:
+        await async_client.close()
+
+
+def main():
+    # Initialize the chat history
+    chat_history = []
+
+    while True:
+        # Get user input from the console
+        user_input = input("User: ")
+        user_message = {"role": "user", "content": user_input}
+
+        # Append the user input to the chat history
+        chat_history.append(user_message)
+
+        stream = client.chat.completions.create(
+            messages=chat_history,
+            model="llama3.1-8b",
+            stream=True,
+        )
+
+        # Display the response as the tokens arrive
+        print("Assistant: ", end="", flush=True)
+        content = []
+        usage, time_info = None, None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                content.append(chunk.choices[0].delta.content)
+                print(chunk.choices[0].delta.content, end="", flush=True)
+            # The final chunk carries the usage and timing info
+            if getattr(chunk, "usage", None):
+                usage, time_info = chunk.usage, getattr(chunk, "time_info", None)
+        print("")
+
+        # Append the user's response to the chat history
+        chat_history.append({
+            "role": "assistant",
+            "content": "".join(content)
+        })
+
+        # Skip the stats if the stream ended without usage and timing info
+        if usage is None or time_info is None:
+            print("")
+            continue
+
+        # Extract values
+        total_tokens = usage.total_tokens
+        total_time = time_info.total_time
+
+        # Calculate tokens per second
+        tokens_per_second = total_tokens / total_time
+
+        # Display the tokens per second
+        print("(Tokens per second: " + str(tokens_per_second) + ")")
+        print("")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,24 @@
 import streamlit as st
 from arxiv_parser import (
     get_ar5iv_link,
-    get_bibliography_from_html,
+    get_bibliography_from_tree,
     get_html_page,
-    get_paragraphs_from_html,
-    get_title_from_html,
+    get_paragraphs_from_tree,
+    get_title_from_tree,
+    parse_html,
 )
-from gist import answer_question, create_summary, get_next_page_break
+from gist import answer_question, get_next_page_break
 from streamlit_helper import (
+    collect_summaries,
     compute_gist_metrics,
     delete_session_state,
     render_llm_metrics,
     render_new_page,
+    record_page_word_count,
     render_processed_pages,
     reset_session_state,
     show_inference_stat_dist,
-    unpack_summary,
+    submit_summary,
     update_inference_client,
 )
 
@@ -73,8 +76,9 @@ Read more about GIST here: https://arxiv.org/pdf/2402.09727
 
         ar5iv_url = get_ar5iv_link(input_url)
         page_html = get_html_page(ar5iv_url)
-        title = get_title_from_html(page_html)
-        bib = get_bibliography_from_html(page_html)
+        tree = parse_html(page_html)
+        title = get_title_from_tree(tree)
+        bib = get_bibliography_from_tree(tree)
         if title is None:
             st.error(
                 f"This app uses arxiv's experimental ar5iv html API. Unfortunately, "
@@ -83,7 +87,7 @@ Read more about GIST here: https://arxiv.org/pdf/2402.09727
             )
             st.stop()
 
-        paragraphs, paragraphs_html = get_paragraphs_from_html(page_html)
+        paragraphs, paragraphs_html = get_paragraphs_from_tree(tree)
 
         if (
             "pause_point" not in st.session_state
@@ -92,6 +96,9 @@ Read more about GIST here: https://arxiv.org/pdf/2402.09727
         ):
             reset_session_state(input_url)
 
+        # Summaries still running from an interrupted run are needed to render
+        # the pages processed so far
+        collect_summaries()
         render_llm_metrics(navbar_placeholder)
         render_processed_pages(title)
 
@@ -99,7 +106,9 @@ Read more about GIST here: https://arxiv.org/pdf/2402.09727
         # The LLM will iteratively group paragraphs together based on
         # narration by selecting "pause points". Paragraphs contained from the
         # old pause point to the new pause point are referred to as a "page". The
-        # LLM then summarizes this new page into a summarized page.
+        # LLM then summarizes this new page into a summarized page. Summaries
+        # are generated in the background while pagination continues.
+        summary_placeholders = {}
         while st.session_state["pause_point"] < len(paragraphs):
             old_pause_point = st.session_state["pause_point"]
             st.session_state["pages"], new_pause_point = get_next_page_break(
@@ -110,27 +119,40 @@ Read more about GIST here: https://arxiv.org/pdf/2402.09727
                 old_pause_point,
                 llm_metrics=st.session_state["llm_metrics"],
                 verbose=False,
+                preceding_text=(
+                    st.session_state["pages_text"][-1]
+                    if st.session_state["pages_text"]
+                    else None
+                ),
             )
 
             page_html = paragraphs_html[old_pause_point:new_pause_point]
             st.session_state["pages_html"].append(page_html)
             st.session_state["pause_point"] = new_pause_point
             added_page_idx = len(st.session_state["pages"]) - 1
+            st.session_state["pages_text"].append(
+                '\n'.join(st.session_state["pages"][added_page_idx])
+            )
+            record_page_word_count(st.session_state["pages"][added_page_idx])
 
             render_llm_metrics(navbar_placeholder)
             cols = render_new_page()
 
+            submit_summary(
+                st.session_state["client"],
+                title,
+                st.session_state["pages"][added_page_idx],
+                page_text=st.session_state["pages_text"][added_page_idx],
+            )
             with cols[1]:
-                summary_stream = create_summary(
-                    st.session_state["client"],
-                    title,
-                    st.session_state["pages"][added_page_idx],
-                    llm_metrics=st.session_state["llm_metrics"],
-                    verbose=False,
-                    stream=True,
-                )
-                st.write_stream(unpack_summary(summary_stream))
-                render_llm_metrics(navbar_placeholder)
+                summary_placeholders[added_page_idx] = st.empty()
+                summary_placeholders[added_page_idx].caption("Summarizing...")
+
+            collect_summaries(summary_placeholders, wait=False)
+            render_llm_metrics(navbar_placeholder)
+
+        collect_summaries(summary_placeholders)
+        render_llm_metrics(navbar_placeholder)
 
         with st.expander("Bibliography"):
             st.markdown(bib, unsafe_allow_html=True)
@@ -150,6 +172,8 @@ Read more about GIST here: https://arxiv.org/pdf/2402.09727
                 llm_metrics=st.session_state["llm_metrics"],
                 verbose=False,
                 stream=True,
+                pages_text=st.session_state["pages_text"],
+                shortened_article=st.session_state["shortened_article"],
             )
             if not isinstance(intermediate, str):
                 st.error(intermediate)
@@ -1,9 +1,33 @@
+import gzip
+import hashlib
 import os
 import re
-from typing import List, Optional, Tuple
+import shutil
+import tempfile
+from typing import List, Optional, Sequence, Tuple
 
+import lxml.etree
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+from lxml.html import HtmlElement
+
+# ar5iv pages are utf-8. The parser is told so explicitly because raw bytes
+# are handed to it, and libxml2 would otherwise fall back to latin-1.
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+# Shared session so that fetching several papers reuses the connection to
+# ar5iv instead of doing a new TCP and TLS handshake for each of them
+_SESSION = requests.Session()
+_SESSION.headers.update(
+    {"Accept-Encoding": "gzip, deflate", "User-Agent": "gist/1.0"}
+)
+_SESSION.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16),
+)
+
+_WS_RE = re.compile(r"\s+")
+_ARXIV_RE = re.compile(r"https\:\/\/arxiv\.org\/\w+\/([\w+.]*)")
 
 
 def get_ar5iv_link(url: str) -> str:
@@ -11,7 +35,7 @@ def get_ar5iv_link(url: str) -> str:
     if url.startswith("https://ar5iv.labs.arxiv.org/html/"):
         ar5iv_url = url
     else:
-        match = re.match(r"https\:\/\/arxiv\.org\/\w+\/([\w+.]*)", url)
+        match = _ARXIV_RE.match(url)
 
         assert match is not None, f"{url} is not a valid arxiv link!"
         paper_id = match.group(1)
@@ -20,78 +44,145 @@ def get_ar5iv_link(url: str) -> str:
     return ar5iv_url
 
 
-def get_html_page(url: str) -> str:
+def get_html_page(url: str) -> bytes:
     # Fetches html contained at the supplied url.
     # Pages are cached so that we don't keep hitting arxiv's servers if we
     # make multiple requests for the same paper
     if not os.path.exists("html_cache"):
         os.makedirs("html_cache")
 
-    cache_key = url[url.rfind("/") + 1 :]
-    file_path = os.path.join("html_cache", cache_key)
-    if os.path.exists(file_path):
-        # Cache hit
-        with open(file_path, "r") as f:
-            return f.read()
-    else:
-        # Cache miss
-        response = requests.get(url)
-        assert response.status_code == 200
-
-        with open(file_path, "w") as f:
-            f.write(response.text)
-            return response.text
-
-
-def get_title_from_html(html: str) -> str:
+    cache_key = hashlib.sha1(url.encode()).hexdigest()
+    file_path = os.path.join("html_cache", cache_key + ".html.gz")
+    if not os.path.exists(file_path):
+        # Cache miss. The raw body is streamed straight into a gzipped
+        # temporary file, which only replaces the cache entry once it is
+        # complete. An interrupted download therefore never leaves a
+        # truncated page in the cache.
+        with _SESSION.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            fd, tmp_path = tempfile.mkstemp(dir="html_cache", suffix=".tmp")
+            os.close(fd)
+            try:
+                with gzip.open(tmp_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+    with gzip.open(file_path, "rb") as f:
+        return f.read()
+
+
+def _has_class(name: str) -> str:
+    # XPath predicate that matches elements carrying the given css class
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _find_first_with_class(
+    tree: HtmlElement, name: str
+) -> Optional[HtmlElement]:
+    # Walks the tree in document order and stops at the first element
+    # carrying the given css class. Unlike an XPath query, this doesn't scan
+    # the rest of the document once the element is found.
+    for element in tree.iter(lxml.etree.Element):
+        classes = element.get("class")
+        if classes is not None and name in classes.split():
+            return element
+    return None
+
+
+def _to_html(element: HtmlElement) -> str:
+    return lxml.html.tostring(element, encoding="unicode", with_tail=False)
+
+
+def _append_readable_text(element: HtmlElement, parts: List[str]):
+    # Appends the text of the element to parts, with math tags replaced by
+    # their latex alttext. The tree itself is left untouched.
+    if element.tag == "math" and element.get("alttext") is not None:
+        parts.append("$" + element.get("alttext") + "$")
+        return
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        # Comments and processing instructions only contribute their tail
+        if isinstance(child.tag, str):
+            _append_readable_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+class LazyHtmlList(Sequence):
+    # Read-only list of the html of some elements. Each element is only
+    # serialized the first time it is accessed, since the app only renders
+    # the paragraphs of pages that haven't been processed yet.
+    def __init__(self, elements: List[HtmlElement]):
+        self._elements = elements
+        self._html = [None] * len(elements)
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self._html[index] is None:
+            self._html[index] = _to_html(self._elements[index])
+        return self._html[index]
+
+
+def parse_html(html: bytes) -> HtmlElement:
+    # Parses an ar5iv webpage. The resulting tree is shared by the extractors
+    # below so that the page only has to be parsed once.
+    return lxml.html.fromstring(html, parser=_HTML_PARSER)
+
+
+def get_title_from_tree(tree: HtmlElement) -> str:
     # Extracts the title from an ar5iv webpage
-    soup = BeautifulSoup(html, 'html.parser')
-    element = soup.find(class_="ltx_title_document")
+    element = _find_first_with_class(tree, "ltx_title_document")
     if element is None:
         return None
-    title = element.get_text()
-    title = " ".join([fragment.strip() for fragment in title.split("\n")])
-    return title
+    return _WS_RE.sub(" ", element.text_content()).strip()
 
 
-def get_paragraphs_from_html(html: str) -> Tuple[List[str], List[str]]:
+def get_paragraphs_from_tree(
+    tree: HtmlElement,
+) -> Tuple[List[str], Sequence[str]]:
     # Extracts a list of paragraphs from the arxiv webpage. The function returns
     # a human/llm readable representation, and also an html representation which
     # can be directly rendered. The html representation is useful in scenarios
     # where the paragraphs contained custom styling such as latex.
 
-    soup = BeautifulSoup(html, 'html.parser')
-    # Try to get all paragraphs *after* title
-    element = soup.find(class_="ltx_title_document")
-    if element is None:
-        elements = soup.find_all(class_="ltx_p")
+    # Try to get all paragraphs *after* title. The title sits near the top of
+    # the page, so the document is only walked once in full.
+    title = _find_first_with_class(tree, "ltx_title_document")
+    if title is None:
+        elements = tree.xpath(f"//*[{_has_class('ltx_p')}]")
     else:
-        elements = element.find_all_next(class_="ltx_p")
+        elements = title.xpath(f"following::*[{_has_class('ltx_p')}]")
 
-    original_html = [str(e) for e in elements]
+    original_html = LazyHtmlList(elements)
     llm_readable = []
 
     for e in elements:
-        math_tags = e.find_all('math')
-        for math_tag in math_tags:
-            alttext = math_tag.get("alttext", None)
-            if alttext is not None:
-                alttext = "$" + alttext + "$"
-                math_tag.replace_with(alttext)
-        llm_readable.append(e.get_text())
+        parts = []
+        _append_readable_text(e, parts)
+        llm_readable.append("".join(parts))
 
     return llm_readable, original_html
 
 
-def get_bibliography_from_html(html) -> Optional[str]:
+def get_bibliography_from_tree(tree: HtmlElement) -> Optional[str]:
     # Extracts the bibliography from an arxiv webpage. A bibliography does not
     # exist, returns None.
-    soup = BeautifulSoup(html, 'html.parser')
-    # Try to get all paragraphs *after* title
-    bib = soup.find(id="bib")
+    bib = tree.get_element_by_id("bib", None)
     if bib is None:
         return None
-    biblist = bib.find_next(class_="ltx_biblist")
-    if biblist is None:
-        return str(bib)
-    return str(biblist)
+    biblist = bib.xpath(
+        f"(descendant::*[{_has_class('ltx_biblist')}]"
+        f" | following::*[{_has_class('ltx_biblist')}])[1]"
+    )
+    if not biblist:
+        return _to_html(bib)
+    return _to_html(biblist[0])
@@ -1,8 +1,13 @@
+import hashlib
+import os
 import re
+import tempfile
+import threading
 import time
 from dataclasses import dataclass
 from typing import Union
 
+import orjson
 from fireworks.client import Fireworks
 from openai import OpenAI
 
@@ -32,7 +37,17 @@ def get_client(inference_provider, model, base_url=None, api_key=None):
     return ClientContainer(client, model)
 
 
+# LLM calls can run on several threads at once (e.g. page summaries), so
+# updates to the shared metrics are serialized
+llm_metrics_lock = threading.Lock()
+
+
 def update_llm_metrics(llm_metrics, response, delta_time):
+    with llm_metrics_lock:
+        _update_llm_metrics(llm_metrics, response, delta_time)
+
+
+def _update_llm_metrics(llm_metrics, response, delta_time):
     if hasattr(response, "time_info"):
         time_taken = response.time_info.completion_time
     else:
@@ -74,6 +89,50 @@ def unpack_streaming_response(
                 update_llm_metrics(llm_metrics, chunk, endtime - startime)
 
 
+def get_llm_cache_path(model, messages, tools=None):
+    # Responses are cached on disk, keyed by a hash of the request, so that
+    # re-reading the same paper doesn't repeat identical LLM calls
+    if not os.path.exists("llm_cache"):
+        os.makedirs("llm_cache")
+
+    request = {"model": model, "messages": messages}
+    if tools is not None:
+        request["tools"] = tools
+    request = orjson.dumps(request, option=orjson.OPT_SORT_KEYS)
+    cache_key = hashlib.sha256(request).hexdigest()
+    return os.path.join("llm_cache", cache_key)
+
+
+def write_llm_cache(file_path, data):
+    # The response is written to a temporary file, which only replaces the
+    # cache entry once it is complete. An interrupted write therefore never
+    # leaves a truncated response in the cache for later runs to replay.
+    fd, tmp_path = tempfile.mkstemp(dir="llm_cache", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _as_stream(text):
+    # Wraps a complete text in a single-chunk generator for callers that
+    # expect a streamed response
+    yield text
+
+
+def cache_streaming_response(streaming_text, file_path):
+    # Passes the chunks through and writes the full response to the cache
+    # once the stream has been consumed completely
+    chunks = []
+    for chunk in streaming_text:
+        chunks.append(chunk)
+        yield chunk
+    write_llm_cache(file_path, "".join(chunks).encode())
+
+
 def run_llm(
     client_container: ClientContainer,
     messages,
@@ -81,6 +140,14 @@ def run_llm(
     verbose=False,
     stream=False,
 ):
+    file_path = get_llm_cache_path(client_container.model, messages)
+    if os.path.exists(file_path):
+        # Cache hit
+        with open(file_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        return _as_stream(text) if stream else text
+
+    # Cache miss
     startime = time.time()
     response = client_container.client.chat.completions.create(
         model=client_container.model,
@@ -91,13 +158,56 @@ def run_llm(
         if llm_metrics is not None:
             endtime = time.time()
             update_llm_metrics(llm_metrics, response, endtime - startime)
-        return response.choices[0].message.content
+        text = response.choices[0].message.content
+        write_llm_cache(file_path, text.encode())
+        return text
     else:
-        return unpack_streaming_response(
-            response, startime, llm_metrics=llm_metrics, verbose=verbose
+        return cache_streaming_response(
+            unpack_streaming_response(
+                response, startime, llm_metrics=llm_metrics, verbose=verbose
+            ),
+            file_path,
         )
 
 
+def run_llm_with_tools(
+    client_container: ClientContainer,
+    messages,
+    tools,
+    llm_metrics=None,
+):
+    # Returns the model's text and its tool calls as (name, arguments) pairs.
+    # Streaming isn't supported here since the tool calls are needed as a whole.
+    file_path = get_llm_cache_path(client_container.model, messages, tools)
+    if os.path.exists(file_path):
+        # Cache hit
+        with open(file_path, "rb") as f:
+            cached = orjson.loads(f.read())
+        return cached["content"], cached["tool_calls"]
+
+    # Cache miss
+    startime = time.time()
+    response = client_container.client.chat.completions.create(
+        model=client_container.model,
+        messages=messages,
+        tools=tools,
+    )
+    if llm_metrics is not None:
+        endtime = time.time()
+        update_llm_metrics(llm_metrics, response, endtime - startime)
+
+    message = response.choices[0].message
+    content = message.content or ""
+    tool_calls = [
+        (tool_call.function.name, orjson.loads(tool_call.function.arguments))
+        for tool_call in message.tool_calls or []
+    ]
+    write_llm_cache(
+        file_path, orjson.dumps({"content": content, "tool_calls": tool_calls})
+    )
+    return content, tool_calls
+
+
 prompt_pagination_template = """
 You are given a passage that is taken from a larger text (article, book, ...) and some numbered labels between the paragraphs in the passage.
 Numbered label are in angeled brackets. For example, if the label number is 19, it shows as <19> in text.
@@ -115,17 +225,17 @@ Passage:
 """
 
 
+_PAUSE_RE = re.compile(r"<(\d+)>")
+
+
 def parse_pause_point(text):
-    text = text.strip("Break point: ")
-    if text[0] != '<':
+    # Only the literal prefix is removed. str.strip would remove any of its
+    # characters from both ends instead.
+    text = text.strip().removeprefix("Break point:").lstrip()
+    match = _PAUSE_RE.match(text)
+    if match is None:
         return None
-    for i, c in enumerate(text):
-        if c == '>':
-            if text[1:i].isnumeric():
-                return int(text[1:i])
-            else:
-                return None
-    return None
+    return int(match.group(1))
 
 
 def count_words(text):
@@ -144,13 +254,18 @@ def get_next_page_break(
     verbose=True,
     llm_metrics=None,
     allow_fallback_to_last=True,
+    preceding_text=None,
 ):
+    # preceding_text is the already joined text of the last page, if the
+    # caller keeps it around
 
     print(f"[Pagination][Article {title}]")
 
     i = start_paragraph
 
-    preceding = "" if i == 0 else "...\n" + '\n'.join(pages[-1])
+    if preceding_text is None and i > 0:
+        preceding_text = '\n'.join(pages[-1])
+    preceding = "" if i == 0 else "...\n" + preceding_text
     passage = [paragraphs[i]]
     wcount = count_words(paragraphs[i])
     j = i + 1
@@ -166,6 +281,10 @@ def get_next_page_break(
     pause_point = None
     if wcount < 350:
         pause_point = len(paragraphs)
+    elif j == len(paragraphs) and wcount < word_limit * 1.5:
+        # The rest of the document isn't much longer than a regular page, so
+        # it becomes the last page without asking the LLM for a break point
+        pause_point = len(paragraphs)
     else:
         prompt = prompt_pagination_template.format(
             preceding, '\n'.join(passage), end_tag
@@ -205,17 +324,28 @@ Passage:
 """
 
 
+_SHORTENED_RE = re.compile(r"here[a-z ]+ shortened.*?\:", re.IGNORECASE)
+
+
 def post_process_response(text: str) -> str:
-    match = re.match(r"(here[a-z ]+ shortened.*?\:)", text.lower())
+    match = _SHORTENED_RE.match(text)
     if match is not None:
-        text = text[len(match.group(1)) :].strip()
+        text = text[match.end() :].strip()
     return text
 
 
 def create_summary(
-    client_container, title, page, llm_metrics=None, verbose=True, stream=False
+    client_container,
+    title,
+    page,
+    llm_metrics=None,
+    verbose=True,
+    stream=False,
+    page_text=None,
 ):
-    prompt = prompt_shorten_template.format('\n'.join(page))
+    if page_text is None:
+        page_text = '\n'.join(page)
+    prompt = prompt_shorten_template.format(page_text)
     response = run_llm(
         client_container,
         [
@@ -274,6 +404,39 @@ Question:
 Take a deep breath and tell me: Which page(s) would you like to read again?
 """
 
+prompt_tool_answer_template = """
+The following text is what you remembered from reading an article and a question related to it.
+Each page is a shortened version of the original page.
+If you need to read 1 to 6 page(s) of the article again to answer the question, call the lookup_pages tool with their page numbers.
+Otherwise, answer the question directly.
+DO NOT select more pages if you don't need to.
+
+Text:
+{}
+
+Question:
+{}
+"""
+
+lookup_pages_tool = {
+    "type": "function",
+    "function": {
+        "name": "lookup_pages",
+        "description": "Read the original text of some pages of the article again.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "page_ids": {
+                    "type": "array",
+                    "items": {"type": "integer"},
+                    "description": "Numbers of the pages to read again.",
+                }
+            },
+            "required": ["page_ids"],
+        },
+    },
+}
+
 prompt_mc_answer_template = """
 Read the following article and answer a multiple choice question.
 For example, if (C) is correct, answer with \"Answer: (C) ...\"
@@ -299,21 +462,26 @@ Question:
 """
 
 
-def answer_question(
+def get_valid_page_ids(page_ids, pages):
+    valid_page_ids = []
+    for page_id in page_ids:
+        if page_id < 0 or page_id >= len(pages):
+            print("Skip invalid page number: ", page_id, flush=True)
+        else:
+            valid_page_ids.append(page_id)
+    return valid_page_ids
+
+
+def lookup_pages_with_prompt(
     client_container,
-    title,
     pages,
-    shortened_pages,
+    shortened_article,
     question,
     llm_metrics=None,
     verbose=True,
-    stream=False,
 ):
-    shortened_pages_pidx = []
-    for i, shortened_text in enumerate(shortened_pages):
-        shortened_pages_pidx.append(f"\nPage {i}:\n" + shortened_text)
-    shortened_article = '\n'.join(shortened_pages_pidx)
-
+    # Asks the model which pages to look up with a dedicated prompt and
+    # parses the page numbers out of its response
     prompt_lookup = prompt_lookup_template.format(shortened_article, question)
 
     page_ids = []
@@ -339,14 +507,118 @@ def answer_question(
         end = 0
     if start < end:
         page_ids_str = intermediate_response[start + 1 : end].split(',')
-        page_ids = []
-        for p in page_ids_str:
-            if p.strip().isnumeric():
-                page_id = int(p)
-                if page_id < 0 or page_id >= len(pages):
-                    print("Skip invalid page number: ", page_id, flush=True)
-                else:
-                    page_ids.append(page_id)
+        page_ids = get_valid_page_ids(
+            [int(p) for p in page_ids_str if p.strip().isnumeric()], pages
+        )
+
+    return intermediate_response, page_ids
+
+
+def answer_or_lookup_pages_with_tool(
+    client_container,
+    pages,
+    shortened_article,
+    question,
+    llm_metrics=None,
+):
+    # Lets the model either answer right away or call the lookup_pages tool,
+    # which saves the separate look-up request when no page is needed.
+    # Returns the model's text and the pages it looked up, or None if it
+    # answered directly.
+    content, tool_calls = run_llm_with_tools(
+        client_container,
+        [
+            {
+                "role": "user",
+                "content": prompt_tool_answer_template.format(
+                    shortened_article, question
+                ),
+            }
+        ],
+        [lookup_pages_tool],
+        llm_metrics=llm_metrics,
+    )
+    page_ids = None
+    for name, arguments in tool_calls:
+        if name == "lookup_pages":
+            page_ids = (page_ids or []) + [
+                page_id
+                for page_id in arguments.get("page_ids", [])
+                if isinstance(page_id, int)
+            ]
+    content = content.strip()
+    if page_ids is not None:
+        page_ids = get_valid_page_ids(page_ids, pages)
+        content = content or f"I want to look up Page {page_ids}"
+    return content, page_ids
+
+
+def get_shortened_article_part(page_idx, shortened_text):
+    # Summary of a page as it appears in the shortened article. Parts are
+    # joined with newlines.
+    return f"\nPage {page_idx}:\n" + shortened_text
+
+
+def answer_question(
+    client_container,
+    title,
+    pages,
+    shortened_pages,
+    question,
+    llm_metrics=None,
+    verbose=True,
+    stream=False,
+    use_tools=True,
+    pages_text=None,
+    shortened_article=None,
+):
+    # pages_text and shortened_article hold the already joined text of each
+    # page and of the summaries, if the caller keeps them around
+    if pages_text is None:
+        pages_text = ['\n'.join(page) for page in pages]
+
+    if shortened_article is None:
+        shortened_article = '\n'.join(
+            get_shortened_article_part(i, shortened_text)
+            for i, shortened_text in enumerate(shortened_pages)
+        )
+
+    page_ids = None
+    if use_tools:
+        try:
+            intermediate_response, page_ids = answer_or_lookup_pages_with_tool(
+                client_container,
+                pages,
+                shortened_article,
+                question,
+                llm_metrics=llm_metrics,
+            )
+        except Exception as e:
+            # Not every provider and model supports tool calling, fall back
+            # to the separate look-up prompt
+            print("Tool calling failed, falling back to look-up prompt: ", e)
+            use_tools = False
+        else:
+            if page_ids is None:
+                if verbose:
+                    print("Model answered without looking up pages")
+                answer = intermediate_response
+                intermediate_response = "No page needed to be looked up."
+                return intermediate_response, (
+                    _as_stream(answer) if stream else answer
+                )
+
+    if not use_tools:
+        intermediate_response, page_ids = lookup_pages_with_prompt(
+            client_container,
+            pages,
+            shortened_article,
+            question,
+            llm_metrics=llm_metrics,
+            verbose=verbose,
+        )
+        if page_ids is None:
+            return intermediate_response, None
 
     if verbose:
         print("Model chose to look up page {}".format(page_ids))
@@ -355,7 +627,7 @@ def answer_question(
     expanded_shortened_pages = shortened_pages[:]
     if len(page_ids) > 0:
         for page_id in page_ids:
-            expanded_shortened_pages[page_id] = '\n'.join(pages[page_id])
+            expanded_shortened_pages[page_id] = pages_text[page_id]
 
     expanded_shortened_article = '\n'.join(expanded_shortened_pages)
     if verbose:
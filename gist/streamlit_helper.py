@@ -1,7 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import matplotlib.pyplot as plt
 import numpy as np
 import streamlit as st
-from gist import count_words, get_client
+from gist import (
+    count_words,
+    create_summary,
+    get_client,
+    get_shortened_article_part,
+)
+
+# Summaries don't depend on each other, so they are generated in the
+# background while the LLM keeps paginating the rest of the paper
+summary_executor = ThreadPoolExecutor(max_workers=8)
 
 
 def render_llm_metrics(navbar_placeholder):
@@ -19,6 +30,13 @@ def render_llm_metrics(navbar_placeholder):
             st.write(st.session_state["gist_metrics"])
 
 
+# Bins are only recomputed when a distribution has changed since the dialog
+# was last opened
+@st.cache_data(show_spinner=False)
+def compute_histogram(values):
+    return np.histogram(np.asarray(values), bins=20)
+
+
 def show_inference_stat_dist(inference_stat_dist_placeholder):
     with inference_stat_dist_placeholder.container():
         inference_stat_dist_btn = st.button(
@@ -32,11 +50,14 @@ def show_inference_stat_dist(inference_stat_dist_placeholder):
             for k, v in st.session_state["llm_metrics"][
                 "distributions"
             ].items():
+                counts, edges = compute_histogram(tuple(v))
                 fig, ax = plt.subplots()
-                ax.hist(np.array(v), bins=20)
+                ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge")
                 ax.set_xlabel(k)
                 ax.set_ylabel("Frequency")
                 st.pyplot(fig)
+                # Figures are kept alive by pyplot until they are closed
+                plt.close(fig)
 
         if inference_stat_dist_btn:
             show_distribution()
@@ -48,7 +69,13 @@ def delete_session_state():
         "pause_point",
         "pages",
         "pages_html",
+        "pages_text",
         "shortened_pages",
+        "summary_futures",
+        "summary_errors",
+        "shortened_article",
+        "page_word_counts",
+        "summary_word_counts",
         "llm_metrics",
         "gist_metrics",
         "inference_provider",
@@ -64,7 +91,19 @@ def reset_session_state(input_url):
     st.session_state["pause_point"] = 0
     st.session_state["pages"] = []
     st.session_state["pages_html"] = []
+    # Joined text of each page, reused across the prompts that include it
+    st.session_state["pages_text"] = []
     st.session_state["shortened_pages"] = []
+    st.session_state["summary_futures"] = []
+    # Error messages of the pages whose summary failed, by page index
+    st.session_state["summary_errors"] = {}
+    # The summaries joined as they are given to the LLM during Q&A. It grows
+    # with each summary instead of being rebuilt for every question.
+    st.session_state["shortened_article"] = ""
+    # Word counts are recorded as pages and summaries are added, so the GIST
+    # metrics don't need to re-count the whole document
+    st.session_state["page_word_counts"] = []
+    st.session_state["summary_word_counts"] = []
     st.session_state["llm_metrics"] = {
         "llm_calls": 0,
         "completion_time": 0,
@@ -117,6 +156,8 @@ def render_processed_pages(title):
                 for p in st.session_state["pages_html"][i]:
                     st.markdown(p, unsafe_allow_html=True)
             with cols[1]:
+                if i in st.session_state["summary_errors"]:
+                    st.error(st.session_state["summary_errors"][i])
                 st.write(st.session_state["shortened_pages"][i])
         html_elem = f"<div id=\"page-{st.session_state['pause_point']}\" style=\"height: 0px;\"></div>"
         html_elem += "<script>console.log(\"hello world!\"); setTimeout(function(){document.getElementById(\"page-"
@@ -145,24 +186,66 @@ def render_new_page():
     return cols
 
 
-def unpack_summary(streaming_text):
-    summary_page = ""
-    for chunk in streaming_text:
-        summary_page += chunk
-        yield chunk
-    st.session_state["shortened_pages"].append(summary_page)
+def record_page_word_count(page):
+    st.session_state["page_word_counts"].append(
+        sum(count_words(paragraph) for paragraph in page)
+    )
+
+
+def submit_summary(client, title, page, page_text=None):
+    # Starts summarizing the page in the background
+    st.session_state["summary_futures"].append(
+        summary_executor.submit(
+            create_summary,
+            client,
+            title,
+            page,
+            llm_metrics=st.session_state["llm_metrics"],
+            verbose=False,
+            page_text=page_text,
+        )
+    )
+
+
+def collect_summaries(placeholders=None, wait=True):
+    # Moves finished summaries into shortened_pages, keeping page order. If
+    # placeholders are given, the summaries are also written into them. With
+    # wait=False, stops at the first summary that isn't ready yet.
+    futures = st.session_state["summary_futures"]
+    while len(st.session_state["shortened_pages"]) < len(futures):
+        i = len(st.session_state["shortened_pages"])
+        if not wait and not futures[i].done():
+            break
+        try:
+            summary = futures[i].result()
+        except Exception as e:
+            # The page's full text stands in for its summary, so a failed
+            # summary doesn't break the page for the rest of the session
+            summary = st.session_state["pages_text"][i]
+            st.session_state["summary_errors"][i] = (
+                f"Summarizing this page failed, showing it in full: {e}"
+            )
+        st.session_state["shortened_pages"].append(summary)
+        st.session_state["summary_word_counts"].append(count_words(summary))
+        part = get_shortened_article_part(i, summary)
+        if i > 0:
+            part = "\n" + part
+        st.session_state["shortened_article"] += part
+        if placeholders is not None and i in placeholders:
+            with placeholders[i].container():
+                if i in st.session_state["summary_errors"]:
+                    st.error(st.session_state["summary_errors"][i])
+                st.write(summary)
 
 
 def compute_gist_metrics():
     st.session_state["gist_metrics"] = {}
     st.session_state["gist_metrics"]["document_words"] = sum(
-        count_words(paragraph)
-        for page in st.session_state["pages"]
-        for paragraph in page
+        st.session_state["page_word_counts"]
     )
 
     st.session_state["gist_metrics"]["summary_words"] = sum(
-        count_words(summary) for summary in st.session_state["shortened_pages"]
+        st.session_state["summary_word_counts"]
     )
 
     st.session_state["gist_metrics"]["compression_rate"] = 100 * (
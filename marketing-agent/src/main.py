@@ -1,18 +1,39 @@
 import argparse
 import asyncio
+import logging
 import os
 import sys
 
 from dotenv import load_dotenv
 
+try:
+    # Faster event loop, not available on Windows
+    import uvloop
+except ImportError:
+    uvloop = None
+
 load_dotenv()
 
 from marketing_agent.campaign import Campaign, StatusMessageType
+from marketing_agent.llm.cached_engine import AsyncCachedEngine
+from marketing_agent.llm.concurrency_limited_engine import (
+    AsyncConcurrencyLimitedEngine,
+)
+from marketing_agent.llm.rate_limited_engine import AsyncRateLimitedEngine
+
+# Maximum number of requests per minute sent to each provider. 0 for no limit.
+REQUESTS_PER_MINUTE = float(os.environ.get("REQUESTS_PER_MINUTE") or 0)
+# Maximum number of requests in flight to each provider
+MAX_INFLIGHT = int(os.environ.get("MAX_INFLIGHT") or 64)
+# Maximum number of messages waiting in the feed. When it's full, status messages
+# are dropped and generated copy waits for room.
+FEED_SIZE = 1024
 
 
 async def process_status_messages(feed: asyncio.Queue, output_dir: str):
     """
-    Continuously print messages from the feed queue until cancelled.
+    Continuously print messages from the feed queue until a None message marks the
+    end of the campaign, or until cancelled.
 
     This function prints status updates and writes generated files to disk.
 
@@ -23,7 +44,10 @@ async def process_status_messages(feed: asyncio.Queue, output_dir: str):
 
     try:
         while True:
-            message_type, message = await feed.get()
+            item = await feed.get()
+            if item is None:
+                return
+            message_type, message = item
             if message_type == StatusMessageType.STATUS:
                 print(f"STATUS: {message}")
             elif message_type == StatusMessageType.FILE_CREATED:
@@ -111,6 +135,9 @@ async def main():
     messages and file creation through `process_status_messages`.
     """
     args = parse_arguments()
+    # Failures are logged with the same prefix style as the status messages
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+
     if args.provider == "cerebras":
         from marketing_agent.llm.cerebras_engine import AsyncCerebrasEngine
 
@@ -128,15 +155,29 @@ async def main():
 
         reasoning_llm = AsyncTogetherEngine(args.reasoning_model)
 
+    # Pace the requests to stay under the provider's rate limit. Cached responses
+    # don't count towards it.
+    if REQUESTS_PER_MINUTE:
+        reasoning_llm = AsyncRateLimitedEngine(reasoning_llm, REQUESTS_PER_MINUTE)
+    # Bound the requests in flight so the fan-out doesn't exhaust connections
+    reasoning_llm = AsyncConcurrencyLimitedEngine(reasoning_llm, MAX_INFLIGHT)
+
+    # Answer repeated identical queries from memory instead of the provider
+    reasoning_llm = AsyncCachedEngine(reasoning_llm)
+
     if args.hallucinate:
         search_llm = reasoning_llm
     else:
         from marketing_agent.llm.perplexity_engine import AsyncPerplexityEngine
 
         search_llm = AsyncPerplexityEngine(args.search_model)
+        if REQUESTS_PER_MINUTE:
+            search_llm = AsyncRateLimitedEngine(search_llm, REQUESTS_PER_MINUTE)
+        search_llm = AsyncConcurrencyLimitedEngine(search_llm, MAX_INFLIGHT)
+        search_llm = AsyncCachedEngine(search_llm)
 
     # Create a queue to receive status updates and generated copy
-    feed = asyncio.Queue()
+    feed = asyncio.Queue(maxsize=FEED_SIZE)
     feed_task = asyncio.create_task(process_status_messages(feed, args.output))
 
     # Read the product description
@@ -150,10 +191,21 @@ async def main():
     campaign = Campaign(
         reasoning_llm, search_llm, product_description, args.revisions, feed
     )
-    await campaign.generate()
-
-    # Close the queue
-    feed_task.cancel()
-
-
-asyncio.run(main())
+    try:
+        await campaign.generate()
+    finally:
+        # Close the connections to the providers
+        await reasoning_llm.aclose()
+        if search_llm is not reasoning_llm:
+            await search_llm.aclose()
+
+    # Write out every message still in the feed, so that the last revision of
+    # each copy isn't dropped, then stop the consumer
+    await feed.put(None)
+    await feed_task
+
+
+if uvloop is not None:
+    uvloop.run(main())
+else:
+    asyncio.run(main())
@@ -1,6 +1,8 @@
 import asyncio
+import functools
+import itertools
+import logging
 import os
-import traceback
 from collections import defaultdict
 from enum import Enum
 from typing import Union
@@ -10,12 +12,76 @@ from pydantic import BaseModel
 
 from .datatypes import (Audience, AudienceUnion, Channel, CopyStrategy, Market,
                         ProductAngle)
-from .llm.base_engine import AsyncLLMEngine
+from .llm.base_engine import AsyncLLMEngine, compile_user_prompt
 from .marketing_copy import CopyPiece
 
-# Use this to ensure that each copy gets a unique filename
-_copy_counters = defaultdict(int)
-FULLY_PARALLEL = os.environ.get("FULLY_PARALLEL", False)
+logger = logging.getLogger(__name__)
+
+# LibYAML's emitter when PyYAML was built with it. It writes the same YAML as the
+# pure Python one, several times faster.
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+# Maximum number of copies generated at the same time
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", 32))
+# Maximum number of channels whose strategies are generated in a single LLM
+# call. Larger batches make each response slower to generate.
+STRATEGY_BATCH_SIZE = 6
+# Angle fields that each analysis depends on. Angles sharing them share the
+# analysis.
+_ANALYSIS_INPUTS = {
+    "markets": ("value_proposition", "usage"),
+    "audiences": ("problem_addressed", "usage"),
+    "markets_audiences": ("value_proposition", "problem_addressed", "usage"),
+}
+
+
+# Response models of the LLM queries. They're defined once here rather than in the
+# methods so that pydantic builds their schemas once instead of on every call.
+
+
+# Response of `create_copy_strategies_for_channels`.
+class _StrategiesResponse(BaseModel):
+    strategies: list[CopyStrategy]
+
+
+# Response of the channel query in `create_copy_for_market_audience`.
+class _ChannelsResponse(BaseModel):
+    channels: list[Channel]
+
+
+# Response of `generate_market_analysis`.
+class _MarketsResponse(BaseModel):
+    markets: list[Market]
+
+
+# Response of `generate_audience_analysis`.
+class _AudiencesResponse(BaseModel):
+    audiences: list[AudienceUnion]
+
+
+# Response of `generate_market_and_audience_analysis`.
+class _MarketsAndAudiencesResponse(BaseModel):
+    markets: list[Market]
+    audiences: list[AudienceUnion]
+
+
+# Response of `generate_market_analyses`.
+class _BatchMarketsResponse(BaseModel):
+    analyses: list[_MarketsResponse]
+
+
+# Response of `generate_audience_analyses`.
+class _BatchAudiencesResponse(BaseModel):
+    analyses: list[_AudiencesResponse]
+
+
+# Response of `generate_market_and_audience_analyses`.
+class _BatchMarketsAndAudiencesResponse(BaseModel):
+    analyses: list[_MarketsAndAudiencesResponse]
+
+
+# Response of the angle query in `Campaign.generate`.
+class _AnglesResponse(BaseModel):
+    candidates: list[ProductAngle]
 
 
 class StatusMessageType(Enum):
@@ -25,62 +91,95 @@ class StatusMessageType(Enum):
     Attributes:
         STATUS: Represents a general status update message.
         FILE_CREATED: Represents a message indicating a file has been created. The
-                      corresponding message includes 'filename' and 'content' keys.
+                      corresponding message includes 'filename', 'content' and
+                      'revision' keys. Each revision of a copy reuses the same
+                      filename, superseding the previous revision.
     """
 
     STATUS = "STATUS"
     FILE_CREATED = "FILE_CREATED"
 
 
-def _submit_copy(
+def _dump_yaml(model: BaseModel) -> str:
+    """
+    Serialize a pydantic model to YAML.
+
+    Args:
+        model (BaseModel): The model to serialize.
+
+    Returns:
+        str: The YAML representation of the model.
+    """
+    return yaml.dump(model.model_dump(mode="json"), Dumper=_YAML_DUMPER)
+
+
+def _evict_failure(memo: dict, key: tuple, future: asyncio.Future):
+    """
+    Remove a failed call from a memo so that later calls with the same key run again.
+
+    Args:
+        memo (dict): The futures of the calls made so far, by key.
+        key (tuple): The key of the call.
+        future (asyncio.Future): The finished call.
+    """
+    if future.cancelled() or future.exception() is not None:
+        if memo.get(key) is future:
+            del memo[key]
+
+
+async def _submit_copy(
     feed: asyncio.Queue,
-    channel: Channel,
+    filename: str,
     metadata: BaseModel,
     content: Union[str, BaseModel],
+    revision: int,
 ):
     """
     Submit generated copy to the feed queue.
 
+    If the feed is full, this waits for room rather than dropping the copy.
+
     Args:
         feed (asyncio.Queue): The queue to submit status messages to.
-        channel (Channel): The marketing channel for the copy.
-        metadata (BaseModel): The metadata for the copy.
-        content (Union[str, BaseModel]): The content of the copy.
+        filename (str): The base filename of the copy, shared by all its revisions.
+        metadata (BaseModel): The metadata for the copy, or None to leave the
+                              metadata file as it is.
+        content (Union[str, BaseModel]): The content of the copy, or None to leave
+                                         the content file as it is.
+        revision (int): The revision of the copy. 0 is the initial draft.
     """
-    global _copy_counters
-
-    if metadata == None and content == None:
-        return
-
-    _copy_counters[channel.name] += 1
-    filename = f"{channel.name}-{_copy_counters[channel.name]}"
-
-    if metadata != None:
-        feed.put_nowait(
+    if metadata is not None:
+        await feed.put(
             (
                 StatusMessageType.FILE_CREATED,
                 {
                     "filename": f"{filename}-metadata.yaml",
-                    "content": yaml.dump(metadata.model_dump()),
+                    "content": _dump_yaml(metadata),
+                    "revision": revision,
                 },
             )
         )
 
-    if content != None:
+    if content is not None:
         if isinstance(content, str):
-            feed.put_nowait(
+            await feed.put(
                 (
                     StatusMessageType.FILE_CREATED,
-                    {"filename": f"{filename}-content.md", "content": content},
+                    {
+                        "filename": f"{filename}-content.md",
+                        "content": content,
+                        "revision": revision,
+                    },
                 )
             )
         else:
-            feed.put_nowait(
+            await feed.put(
                 (
                     StatusMessageType.FILE_CREATED,
                     {
                         "filename": f"{filename}-content.yaml",
-                        "content": yaml.dump(content.model_dump()),
+                        "content": _dump_yaml(content),
+                        "revision": revision,
                     },
                 )
             )
@@ -94,12 +193,254 @@ class Campaign:
         product_description: str,
         num_revisions: int,
         feed: asyncio.Queue,
+        max_concurrency: int = MAX_CONCURRENCY,
     ):
         self.reasoning_llm = reasoning_llm
         self.search_llm = search_llm
         self.product_description = product_description
         self.num_revisions = num_revisions
         self.feed = feed
+        # Bounds the number of copies generated at the same time to respect the
+        # providers' rate limits
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Futures of the analyses and strategies whose inputs were already seen, so
+        # that angles, markets and audiences sharing them don't repeat the LLM calls
+        self._analyses = {}
+        self._strategies = {}
+        # Tasks running the memoized calls. They're shared between branches, so no
+        # single branch owns them, and `generate` cancels any still running when
+        # it finishes.
+        self._tasks = set()
+        # Use this to ensure that each copy gets a unique filename
+        self._copy_counters = defaultdict(lambda: itertools.count(1))
+
+    def _create_task(self, coroutine) -> asyncio.Task:
+        """
+        Run a coroutine in a task owned by the campaign.
+
+        Args:
+            coroutine: The coroutine to run.
+
+        Returns:
+            asyncio.Task: The task running the coroutine.
+        """
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _cancel_tasks(self):
+        """
+        Cancel the tasks created with `_create_task` that are still running, and
+        wait for them to finish.
+        """
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _memoize(
+        self, memo: dict, key: tuple, coroutine_function, *args
+    ) -> asyncio.Future:
+        """
+        Start a coroutine function once per key.
+
+        Failed calls aren't memoized, so a later call with the same key runs again.
+
+        Args:
+            memo (dict): The futures of the calls made so far, by key.
+            key (tuple): The key identifying the inputs of the call.
+            coroutine_function: The coroutine function to run.
+            *args: The arguments to pass to the coroutine function.
+
+        Returns:
+            asyncio.Future: The future of the call with this key, which may already
+                            have been in flight.
+        """
+        if key not in memo:
+            future = self._create_task(coroutine_function(*args))
+            memo[key] = future
+            future.add_done_callback(functools.partial(_evict_failure, memo, key))
+
+        return memo[key]
+
+    async def _memoized(self, memo: dict, key: tuple, coroutine_function, *args):
+        """
+        Run a coroutine function once per key and share its result.
+
+        Calls with a key that is in flight await the same future. Failed calls
+        aren't memoized, so a later call with the same key runs again.
+
+        Args:
+            memo (dict): The futures of the calls made so far, by key.
+            key (tuple): The key identifying the inputs of the call.
+            coroutine_function: The coroutine function to run.
+            *args: The arguments to pass to the coroutine function.
+
+        Returns:
+            The result of the coroutine function.
+        """
+        future = self._memoize(memo, key, coroutine_function, *args)
+        return await asyncio.shield(future)
+
+    def _memoize_batch(
+        self,
+        memo: dict,
+        keys: list[tuple],
+        batch_function,
+        item_function,
+        items: list,
+    ):
+        """
+        Start a batched coroutine function for the items that aren't memoized yet,
+        and memoize a future for each of them.
+
+        Each item's future resolves to the batch's result at the item's position.
+        Items the batch fails or doesn't return a result for fall back to
+        item_function.
+
+        Args:
+            memo (dict): The futures of the calls made so far, by key.
+            keys (list[tuple]): The key of each item.
+            batch_function: The coroutine function to run with the list of items
+                            that aren't memoized. It returns their results in the
+                            same order, possibly fewer of them.
+            item_function: The coroutine function to run with a single item the
+                           batch didn't return a result for.
+            items (list): The items.
+        """
+        pending = [(key, item) for key, item in zip(keys, items) if key not in memo]
+        if not pending:
+            return
+
+        async def run_batch():
+            try:
+                return await batch_function([item for _, item in pending])
+            except Exception:
+                logger.exception("Batched query failed, retrying the items one by one")
+                return []
+
+        batch = self._create_task(run_batch())
+
+        async def result_for(i, item):
+            results = await asyncio.shield(batch)
+            if i < len(results):
+                return results[i]
+            return await item_function(item)
+
+        for i, (key, item) in enumerate(pending):
+            self._memoize(memo, key, result_for, i, item)
+
+    def _analysis_key(self, kind: str, angle: ProductAngle) -> tuple:
+        """
+        Compute the key under which an analysis of an angle is memoized.
+
+        Args:
+            kind (str): The kind of analysis, one of the keys of _ANALYSIS_INPUTS.
+            angle (ProductAngle): The marketing angle for the product.
+
+        Returns:
+            tuple: The key of the analysis.
+        """
+        return (kind, *(getattr(angle, field) for field in _ANALYSIS_INPUTS[kind]))
+
+    def _strategy_key(
+        self,
+        angle: ProductAngle,
+        market: Market,
+        audience: Audience,
+        channel: Channel,
+    ) -> tuple:
+        """
+        Compute the key under which the copy strategy for a channel is memoized.
+
+        Args:
+            angle (ProductAngle): The marketing angle for the product.
+            market (Market): The target market.
+            audience (Audience): The target audience.
+            channel (Channel): The marketing channel.
+
+        Returns:
+            tuple: The key of the strategy.
+        """
+        return (
+            channel.name,
+            angle.value_proposition,
+            market.market_description,
+            audience.profile,
+        )
+
+    def _cache_prefix(
+        self,
+        angle: ProductAngle = None,
+        market: Market = None,
+        audience: Audience = None,
+    ) -> str:
+        """
+        Compile the context shared by the queries for an angle, market and audience.
+
+        The context is always serialized in the same order, from the most to the least
+        widely shared, so that queries about the same product, angle, market or
+        audience share a prompt prefix that providers can cache.
+
+        Args:
+            angle (ProductAngle, optional): The marketing angle for the product.
+            market (Market, optional): The target market.
+            audience (Audience, optional): The target audience.
+
+        Returns:
+            str: The context to pass as the cache_prefix of a query.
+        """
+        context = {"PRODUCT_DESCRIPTION": self.product_description}
+        if angle is not None:
+            context["PROBLEM_STATEMENT"] = angle.problem_addressed
+            context["VALUE_PROPOSITION"] = angle.value_proposition
+            context["USAGE"] = angle.usage
+        if market is not None:
+            context["MARKET"] = market
+        if audience is not None:
+            context["AUDIENCE_PROFILE"] = audience.profile
+            context["DEMOGRAPHICS"] = audience.demographics
+
+        return compile_user_prompt(**context)
+
+    def _post_status(self, message: str):
+        """
+        Post a status message to the feed.
+
+        Status messages are only informative, so they're dropped when the feed is
+        full instead of holding up the campaign.
+
+        Args:
+            message (str): The status message.
+        """
+        try:
+            self.feed.put_nowait((StatusMessageType.STATUS, message))
+        except asyncio.QueueFull:
+            pass
+
+    async def _gather(self, *coroutines):
+        """
+        Run coroutines concurrently, logging the exceptions of those that fail
+        without interrupting the others.
+
+        The coroutines run in a task group, so if this call is cancelled, all of
+        them are cancelled and finished before it returns instead of being left
+        running in the background.
+
+        Args:
+            *coroutines: The coroutines to run.
+        """
+
+        async def log_failure(coroutine):
+            try:
+                await coroutine
+            except Exception:
+                logger.exception("Campaign branch failed")
+
+        async with asyncio.TaskGroup() as group:
+            for coroutine in coroutines:
+                group.create_task(log_failure(coroutine))
 
     async def create_copy_for_strategy(
         self,
@@ -117,8 +458,22 @@ class Campaign:
             channel (Channel): The marketing channel.
             copy_strategy (CopyStrategy): The strategy for creating the copy.
         """
-        global _copy_counters
+        async with self._semaphore:
+            await self._create_copy_for_strategy(
+                angle, audience, channel, copy_strategy
+            )
 
+    async def _create_copy_for_strategy(
+        self,
+        angle: ProductAngle,
+        audience: Audience,
+        channel: Channel,
+        copy_strategy: CopyStrategy,
+    ):
+        """
+        Implementation of `create_copy_for_strategy`, run while holding the
+        concurrency semaphore.
+        """
         try:
             copy = CopyPiece(
                 self.reasoning_llm,
@@ -129,22 +484,74 @@ class Campaign:
                 copy_strategy,
             )
         except ValueError:
-            print(f"Copy type not supported for {channel.copy_format}")
+            logger.warning("Copy type not supported for %s", channel.copy_format)
             return
 
-        self.feed.put_nowait(
-            (StatusMessageType.STATUS, f"Creating copy for {channel.name} marketing")
-        )
+        self._post_status(f"Creating copy for {channel.name} marketing")
 
+        # Submit the draft and each revision as soon as they're ready. Revisions
+        # are written to the same filename, superseding the previous one.
+        filename = f"{channel.name}-{next(self._copy_counters[channel.name])}"
         try:
             await copy.initialize()
-            for _ in range(self.num_revisions):
+            metadata, content = copy.metadata, copy.content
+            await _submit_copy(self.feed, filename, metadata, content, 0)
+            for revision in range(1, self.num_revisions + 1):
                 await copy.improve()
-        except:
-            traceback.print_exc()
+                # Parts the revision left unchanged aren't serialized and written
+                # again. Small metadata such as a project name rarely changes.
+                await _submit_copy(
+                    self.feed,
+                    filename,
+                    None if copy.metadata == metadata else copy.metadata,
+                    None if copy.content == content else copy.content,
+                    revision,
+                )
+                metadata, content = copy.metadata, copy.content
+        except Exception:
+            logger.exception("Failed to create copy for %s", channel.name)
             return
 
-        _submit_copy(self.feed, channel, copy.metadata, copy.content)
+    async def create_copy_strategy_for_channel(
+        self,
+        angle: ProductAngle,
+        market: Market,
+        audience: Audience,
+        channel: Channel,
+        cache_prefix: str = None,
+    ) -> CopyStrategy:
+        """
+        Generate a copy strategy for a specific channel.
+
+        Args:
+            angle (ProductAngle): The marketing angle for the product.
+            market (Market): The target market.
+            audience (Audience): The target audience.
+            channel (Channel): The marketing channel.
+            cache_prefix (str, optional): The result of `_cache_prefix` for the angle,
+                                          market and audience, if already compiled.
+
+        Returns:
+            CopyStrategy: The strategy for creating the copy.
+
+        Raises an exception if the reasoning engine fails to return a response.
+        """
+
+        self._post_status(
+            f"Generating strategy and evaluation criteria for {channel.name} marketing"
+        )
+
+        return await self.reasoning_llm.query_object(
+            CopyStrategy,
+            cache_prefix=cache_prefix or self._cache_prefix(angle, market, audience),
+            CHANNEL=channel.name,
+            TASK=(
+                "Generate a strategy for generating a COPY_FORMAT for the "
+                "VALUE_PROPOSITION targeting the DEMOGRAPHICS through the CHANNEL. "
+                "Suggest whatever content format is appropriate for the CHANNEL, "
+                "and suggest review criteria for making sure COPY_FORMAT is good."
+            ),
+        )
 
     async def create_copy_for_channel(
         self,
@@ -152,6 +559,7 @@ class Campaign:
         market: Market,
         audience: Audience,
         channel: Channel,
+        cache_prefix: str = None,
     ):
         """
         Generate a copy strategy for a specific channel and create the corresponding copy.
@@ -161,40 +569,140 @@ class Campaign:
             market (Market): The target market.
             audience (Audience): The target audience.
             channel (Channel): The marketing channel.
+            cache_prefix (str, optional): The result of `_cache_prefix` for the angle,
+                                          market and audience, if already compiled.
         """
 
-        # Understand what copy is appropriate for each audience & channel
+        # Understand what copy is appropriate for each audience & channel. The
+        # strategy is shared with any call for this channel with the same value
+        # proposition, market and audience, including calls still in flight.
         try:
-            self.feed.put_nowait(
-                (
-                    StatusMessageType.STATUS,
-                    (
-                        f"Generating strategy and evaluation criteria for {channel.name} "
-                        f"marketing"
-                    ),
-                )
-            )
-
-            strategy = await self.reasoning_llm.query_object(
-                CopyStrategy,
-                PROBLEM_STATEMENT=angle.problem_addressed,
-                VALUE_PROPOSITION=angle.value_proposition,
-                MARKETS=yaml.dump(market.model_dump()),
-                DEMOGRAPHICS=yaml.dump(audience.demographics),
-                CHANNEL=channel.name,
-                TASK=(
-                    "Generate a strategy for generating a COPY_FORMAT for the "
-                    "VALUE_PROPOSITION targeting the DEMOGRAPHICS through the CHANNEL. "
-                    "Suggest whatever content format is appropriate for the CHANNEL, "
-                    "and suggest review criteria for making sure COPY_FORMAT is good."
-                ),
+            strategy = await self._memoized(
+                self._strategies,
+                self._strategy_key(angle, market, audience, channel),
+                self.create_copy_strategy_for_channel,
+                angle,
+                market,
+                audience,
+                channel,
+                cache_prefix,
             )
-        except:
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Failed to generate a strategy for %s", channel.name)
             return
 
         await self.create_copy_for_strategy(angle, audience, channel, strategy)
 
+    async def create_copy_strategies_for_channels(
+        self,
+        angle: ProductAngle,
+        market: Market,
+        audience: Audience,
+        channels: list[Channel],
+        cache_prefix: str = None,
+    ) -> list[CopyStrategy]:
+        """
+        Generate copy strategies for several channels with a single LLM call.
+
+        Args:
+            angle (ProductAngle): The marketing angle for the product.
+            market (Market): The target market.
+            audience (Audience): The target audience.
+            channels (list[Channel]): The marketing channels.
+            cache_prefix (str, optional): The result of `_cache_prefix` for the angle,
+                                          market and audience, if already compiled.
+
+        Returns:
+            list[CopyStrategy]: The strategies in the same order as the channels. The
+                                list may be shorter than channels if the LLM
+                                returned fewer strategies.
+
+        Raises an exception if the reasoning engine fails to return a response.
+        """
+
+        self._post_status(
+            f"Generating strategy and evaluation criteria for "
+            f"{', '.join(channel.name for channel in channels)} marketing"
+        )
+
+        response = await self.reasoning_llm.query_object(
+            _StrategiesResponse,
+            cache_prefix=cache_prefix or self._cache_prefix(angle, market, audience),
+            CHANNELS=[channel.name for channel in channels],
+            TASK=(
+                "For each of the CHANNELS, generate a strategy for generating a "
+                "COPY_FORMAT for the VALUE_PROPOSITION targeting the DEMOGRAPHICS "
+                "through that channel. Suggest whatever content format is "
+                "appropriate for the channel, and suggest review criteria for "
+                "making sure COPY_FORMAT is good. Return exactly one strategy per "
+                "channel, in the same order as the CHANNELS."
+            ),
+        )
+
+        return response.strategies[: len(channels)]
+
+    async def create_copy_for_channels(
+        self,
+        angle: ProductAngle,
+        market: Market,
+        audience: Audience,
+        channels: list[Channel],
+        cache_prefix: str = None,
+    ):
+        """
+        Generate copy strategies for several channels at once and create the
+        corresponding copy.
+
+        Strategies are only requested for channels without a memoized strategy.
+        Channels that didn't get a strategy from the batched call have theirs
+        generated individually by `create_copy_for_channel`.
+
+        Args:
+            angle (ProductAngle): The marketing angle for the product.
+            market (Market): The target market.
+            audience (Audience): The target audience.
+            channels (list[Channel]): The marketing channels.
+            cache_prefix (str, optional): The result of `_cache_prefix` for the angle,
+                                          market and audience, if already compiled.
+        """
+        if cache_prefix is None:
+            cache_prefix = self._cache_prefix(angle, market, audience)
+
+        # Memoize the strategies before they're generated, so that concurrent calls
+        # for the same channels wait for this batch instead of generating them again
+        self._memoize_batch(
+            self._strategies,
+            [
+                self._strategy_key(angle, market, audience, channel)
+                for channel in channels
+            ],
+            functools.partial(
+                self.create_copy_strategies_for_channels,
+                angle,
+                market,
+                audience,
+                cache_prefix=cache_prefix,
+            ),
+            functools.partial(
+                self.create_copy_strategy_for_channel,
+                angle,
+                market,
+                audience,
+                cache_prefix=cache_prefix,
+            ),
+            channels,
+        )
+
+        # Create the copy for every channel from its memoized strategy
+        await self._gather(
+            *[
+                self.create_copy_for_channel(
+                    angle, market, audience, channel, cache_prefix
+                )
+                for channel in channels
+            ]
+        )
+
     async def create_copy_for_market_audience(
         self,
         angle: ProductAngle,
@@ -212,47 +720,47 @@ class Campaign:
         """
 
         # Identify suitable channels for reaching the audience in the market
-        class Response(BaseModel):
-            channels: list[Channel]
-
-        self.feed.put_nowait(
-            (
-                StatusMessageType.STATUS,
-                (
-                    f"Identifying candidate channels for reaching the {audience.profile} "
-                    f"audience in the {market.market_description} market with value "
-                    f"proposition: {angle.value_proposition}"
-                ),
-            )
+        self._post_status(
+            f"Identifying candidate channels for reaching the {audience.profile} "
+            f"audience in the {market.market_description} market with value "
+            f"proposition: {angle.value_proposition}"
         )
 
+        # Serialize the context once for every query about this market and audience
+        cache_prefix = self._cache_prefix(angle, market, audience)
+
         try:
             response = await self.reasoning_llm.query_object(
-                Response,
-                VALUE_PROPOSITION=angle.value_proposition,
-                AUDIENCE_PROFILE=audience.profile,
-                MARKET=market,
-                DEMOGRAPHICS=yaml.dump(audience.demographics),
+                _ChannelsResponse,
+                cache_prefix=cache_prefix,
                 TASK=(
                     "Suggest some channels for reaching the DEMOGRAPHICS with "
                     "VALUE_PROPOSITION in MARKET. Include various social media and "
                     "physical channels where appropriate."
                 ),
             )
-        except:
-            traceback.print_exc()
+        except Exception:
+            logger.exception(
+                "Failed to identify channels for the %s audience in the %s market",
+                audience.profile,
+                market.market_description,
+            )
             return
 
-        # Generate copy for each channel
-        tasks = []
-        for channel in response.channels:
-            tasks.append(self.create_copy_for_channel(angle, market, audience, channel))
-
-        if FULLY_PARALLEL:
-            await asyncio.gather(*tasks)
-        else:
-            for task in tasks:
-                await task
+        # Generate copy for each channel, batching the strategy generation
+        channels = response.channels
+        await self._gather(
+            *[
+                self.create_copy_for_channels(
+                    angle,
+                    market,
+                    audience,
+                    channels[i : i + STRATEGY_BATCH_SIZE],
+                    cache_prefix,
+                )
+                for i in range(0, len(channels), STRATEGY_BATCH_SIZE)
+            ]
+        )
 
     async def generate_market_analysis(self, angle: ProductAngle) -> list[Market]:
         """
@@ -268,23 +776,14 @@ class Campaign:
         """
 
         # Identify candidate markets for the value proposition
-        class Response(BaseModel):
-            markets: list[Market]
-
-        self.feed.put_nowait(
-            (
-                StatusMessageType.STATUS,
-                (
-                    f"Identifying candidate markets for value proposition: "
-                    f"{angle.value_proposition}"
-                ),
-            )
+        self._post_status(
+            f"Identifying candidate markets for value proposition: "
+            f"{angle.value_proposition}"
         )
 
         response = await self.search_llm.query_object(
-            Response,
-            VALUE_PROPOSITION=angle.value_proposition,
-            USAGE_MODEL=angle.usage,
+            _MarketsResponse,
+            cache_prefix=self._cache_prefix(angle),
             TASK=(
                 "Using available market research, suggest some markets where "
                 "VALUE_PROPOSITION through USAGE would be useful."
@@ -308,23 +807,14 @@ class Campaign:
         """
 
         # Identify candidate audiences for the value proposition
-        class Response(BaseModel):
-            audiences: list[AudienceUnion]
-
-        self.feed.put_nowait(
-            (
-                StatusMessageType.STATUS,
-                (
-                    f"Identifying candidate audiences for value proposition: "
-                    f"{angle.value_proposition}"
-                ),
-            )
+        self._post_status(
+            f"Identifying candidate audiences for value proposition: "
+            f"{angle.value_proposition}"
         )
 
         response = await self.reasoning_llm.query_object(
-            Response,
-            PROBLEM_STATEMENT=angle.problem_addressed,
-            USAGE=angle.usage,
+            _AudiencesResponse,
+            cache_prefix=self._cache_prefix(angle),
             TASK=(
                 "Suggest some target audiences for the PROBLEM_STATEMENT with the "
                 "USAGE model."
@@ -334,6 +824,195 @@ class Campaign:
         # Normalize the audience types to the Audience class
         return [x.normalize() for x in response.audiences]
 
+    async def generate_market_and_audience_analysis(
+        self, angle: ProductAngle
+    ) -> tuple[list[Market], list[Audience]]:
+        """
+        Generate a market analysis and an audience analysis for a given product angle
+        with a single LLM call.
+
+        This is only used when the search and reasoning engines are the same, since
+        the market analysis otherwise relies on the search engine.
+
+        Args:
+            angle (ProductAngle): The marketing angle for the product.
+
+        Returns:
+            tuple[list[Market], list[Audience]]: The potential markets and target
+                                                 audiences for the product.
+
+        Raises an exception if the reasoning engine fails to return a response.
+        """
+
+        # Identify candidate markets and audiences for the value proposition
+        response = await self.reasoning_llm.query_object(
+            _MarketsAndAudiencesResponse,
+            cache_prefix=self._cache_prefix(angle),
+            TASK=(
+                "Suggest some markets where VALUE_PROPOSITION through USAGE would be "
+                "useful. Then suggest some target audiences for the PROBLEM_STATEMENT "
+                "with the USAGE model."
+            ),
+        )
+
+        # Normalize the audience types to the Audience class
+        return response.markets, [x.normalize() for x in response.audiences]
+
+    async def generate_market_analyses(
+        self, angles: list[ProductAngle]
+    ) -> list[list[Market]]:
+        """
+        Generate market analyses for several product angles with a single LLM call.
+
+        Args:
+            angles (list[ProductAngle]): The marketing angles for the product.
+
+        Returns:
+            list[list[Market]]: The potential markets for each angle, in the same
+                                order as the angles. The list may be shorter than
+                                angles if the LLM returned fewer analyses.
+
+        Raises an exception if the search engine fails to return a response.
+        """
+
+        self._post_status(
+            f"Identifying candidate markets for {len(angles)} value propositions"
+        )
+
+        response = await self.search_llm.query_object(
+            _BatchMarketsResponse,
+            cache_prefix=self._cache_prefix(),
+            ANGLES=angles,
+            TASK=(
+                "For each of the ANGLES, using available market research, suggest "
+                "some markets where its value_proposition through its usage would "
+                "be useful. Return exactly one analysis per angle, in the same "
+                "order as the ANGLES."
+            ),
+        )
+
+        return [analysis.markets for analysis in response.analyses[: len(angles)]]
+
+    async def generate_audience_analyses(
+        self, angles: list[ProductAngle]
+    ) -> list[list[Audience]]:
+        """
+        Generate audience analyses for several product angles with a single LLM call.
+
+        Args:
+            angles (list[ProductAngle]): The marketing angles for the product.
+
+        Returns:
+            list[list[Audience]]: The potential target audiences for each angle, in
+                                  the same order as the angles. The list may be
+                                  shorter than angles if the LLM returned fewer
+                                  analyses.
+
+        Raises an exception if the reasoning engine fails to return a response.
+        """
+
+        self._post_status(
+            f"Identifying candidate audiences for {len(angles)} value propositions"
+        )
+
+        response = await self.reasoning_llm.query_object(
+            _BatchAudiencesResponse,
+            cache_prefix=self._cache_prefix(),
+            ANGLES=angles,
+            TASK=(
+                "For each of the ANGLES, suggest some target audiences for its "
+                "problem_addressed with its usage model. Return exactly one "
+                "analysis per angle, in the same order as the ANGLES."
+            ),
+        )
+
+        # Normalize the audience types to the Audience class
+        return [
+            [x.normalize() for x in analysis.audiences]
+            for analysis in response.analyses[: len(angles)]
+        ]
+
+    async def generate_market_and_audience_analyses(
+        self, angles: list[ProductAngle]
+    ) -> list[tuple[list[Market], list[Audience]]]:
+        """
+        Generate market and audience analyses for several product angles with a
+        single LLM call.
+
+        Like `generate_market_and_audience_analysis`, this is only used when the
+        search and reasoning engines are the same.
+
+        Args:
+            angles (list[ProductAngle]): The marketing angles for the product.
+
+        Returns:
+            list[tuple[list[Market], list[Audience]]]: The potential markets and
+                target audiences for each angle, in the same order as the angles.
+                The list may be shorter than angles if the LLM returned fewer
+                analyses.
+
+        Raises an exception if the reasoning engine fails to return a response.
+        """
+
+        self._post_status(
+            f"Identifying candidate markets and audiences for {len(angles)} value "
+            f"propositions"
+        )
+
+        response = await self.reasoning_llm.query_object(
+            _BatchMarketsAndAudiencesResponse,
+            cache_prefix=self._cache_prefix(),
+            ANGLES=angles,
+            TASK=(
+                "For each of the ANGLES, suggest some markets where its "
+                "value_proposition through its usage would be useful. Then suggest "
+                "some target audiences for its problem_addressed with its usage "
+                "model. Return exactly one analysis per angle, in the same order as "
+                "the ANGLES."
+            ),
+        )
+
+        # Normalize the audience types to the Audience class
+        return [
+            (analysis.markets, [x.normalize() for x in analysis.audiences])
+            for analysis in response.analyses[: len(angles)]
+        ]
+
+    def memoize_analyses(self, angles: list[ProductAngle]):
+        """
+        Start generating the market and audience analyses of several product angles
+        with batched LLM calls.
+
+        The analyses are memoized, so `create_copy_for_angle` picks them up instead
+        of generating them one angle at a time.
+
+        Args:
+            angles (list[ProductAngle]): The marketing angles for the product.
+        """
+        if self.search_llm is self.reasoning_llm:
+            self._memoize_batch(
+                self._analyses,
+                [self._analysis_key("markets_audiences", x) for x in angles],
+                self.generate_market_and_audience_analyses,
+                self.generate_market_and_audience_analysis,
+                angles,
+            )
+        else:
+            self._memoize_batch(
+                self._analyses,
+                [self._analysis_key("markets", x) for x in angles],
+                self.generate_market_analyses,
+                self.generate_market_analysis,
+                angles,
+            )
+            self._memoize_batch(
+                self._analyses,
+                [self._analysis_key("audiences", x) for x in angles],
+                self.generate_audience_analyses,
+                self.generate_audience_analysis,
+                angles,
+            )
+
     async def create_copy_for_angle(self, angle: ProductAngle):
         """
         Create copy for a specific product angle across various markets and audiences.
@@ -348,77 +1027,89 @@ class Campaign:
         """
         # Identify candidate markets and audiences for the value proposition
         try:
-            self.feed.put_nowait(
-                (
-                    StatusMessageType.STATUS,
-                    (
-                        f"Identifying candidate markets and audiences for value "
-                        f"proposition: {angle.value_proposition}"
+            self._post_status(
+                f"Identifying candidate markets and audiences for value "
+                f"proposition: {angle.value_proposition}"
+            )
+            # Angles with the same inputs share the analyses. When both analyses
+            # would go to the same engine, they're generated with a single call.
+            if self.search_llm is self.reasoning_llm:
+                known_markets, audiences = await self._memoized(
+                    self._analyses,
+                    self._analysis_key("markets_audiences", angle),
+                    self.generate_market_and_audience_analysis,
+                    angle,
+                )
+            else:
+                known_markets, audiences = await asyncio.gather(
+                    self._memoized(
+                        self._analyses,
+                        self._analysis_key("markets", angle),
+                        self.generate_market_analysis,
+                        angle,
+                    ),
+                    self._memoized(
+                        self._analyses,
+                        self._analysis_key("audiences", angle),
+                        self.generate_audience_analysis,
+                        angle,
                     ),
                 )
+        except Exception:
+            logger.exception(
+                "Failed to identify markets and audiences for value proposition: %s",
+                angle.value_proposition,
             )
-            known_markets, audiences = await asyncio.gather(
-                self.generate_market_analysis(angle),
-                self.generate_audience_analysis(angle),
-            )
-        except:
-            traceback.print_exc()
             return
 
         # Generate copy for each market and audience
-        tasks = []
-        for market in known_markets:
-            for audience in audiences:
-                tasks.append(
-                    self.create_copy_for_market_audience(angle, market, audience)
-                )
-
-        if FULLY_PARALLEL:
-            await asyncio.gather(*tasks)
-        else:
-            for task in tasks:
-                await task
+        await self._gather(
+            *[
+                self.create_copy_for_market_audience(angle, market, audience)
+                for market in known_markets
+                for audience in audiences
+            ]
+        )
 
     async def generate(self):
         """
         Generate a complete marketing campaign for a given product description.
 
         This function generates multiple angles for the product and creates copy for each
-        angle across various markets and audiences.
+        angle across various markets and audiences. If it's cancelled, or once it
+        returns, no LLM calls of the campaign are left running.
 
         Args:
             feed (asyncio.Queue): The queue to submit status messages to.
         """
+        try:
+            await self._generate()
+        finally:
+            await self._cancel_tasks()
 
-        # Get candidate angles for the product description
-        class Response(BaseModel):
-            candidates: list[ProductAngle]
+    async def _generate(self):
+        """
+        Implementation of `generate`, without the cleanup of the memoized calls.
+        """
 
+        # Get candidate angles for the product description
         try:
-            self.feed.put_nowait(
-                (
-                    StatusMessageType.STATUS,
-                    "Generating candidate value propositions for the marketing campaign",
-                )
+            self._post_status(
+                "Generating candidate value propositions for the marketing campaign"
             )
             response = await self.reasoning_llm.query_object(
-                Response,
-                PRODUCT_DESCRIPTION=self.product_description,
+                _AnglesResponse,
+                cache_prefix=self._cache_prefix(),
                 TASK="List some candidate angles for PRODUCT_DESCRIPTION.",
             )
-            self.feed.put_nowait(
-                (
-                    StatusMessageType.STATUS,
-                    f"Generated {len(response.candidates)} candidate angles",
-                )
-            )
-        except:
-            traceback.print_exc()
+            self._post_status(f"Generated {len(response.candidates)} candidate angles")
+        except Exception:
+            logger.exception("Failed to generate candidate angles")
             return
 
         product_angles = response.candidates
 
-        # Generate copy for each angle
-        await asyncio.gather(
-            *[self.create_copy_for_angle(x) for x in product_angles],
-        )
+        # Analyze the markets and audiences of all the angles at once, then generate
+        # copy for each angle
+        self.memoize_analyses(product_angles)
+        await self._gather(*[self.create_copy_for_angle(x) for x in product_angles])
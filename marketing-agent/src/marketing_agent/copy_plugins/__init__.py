@@ -5,3 +5,16 @@ from .blog_post import *
 from .video_script import *
 from .github_project import *
 from .press_release import *
+
+from importlib.metadata import entry_points as _entry_points
+from types import MappingProxyType as _MappingProxyType
+
+from . import globals as _globals
+
+# Load third-party plugins, which register themselves in copy_plugins when imported
+for _entry_point in _entry_points(group="marketing_agent.copy_plugins"):
+    _entry_point.load()
+
+# Freeze the registry once every plugin has registered itself, since CopyFormat and
+# the copy classes are derived from it at import time
+_globals.copy_plugins = _MappingProxyType(_globals.copy_plugins)
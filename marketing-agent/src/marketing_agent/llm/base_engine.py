@@ -1,8 +1,9 @@
-import json
+import functools
 from abc import ABC, abstractmethod
 from typing import TypeVar, Union
 from xml.sax.saxutils import escape as xml_escape
 
+import orjson
 from pydantic import BaseModel
 
 T = TypeVar("T", bound=BaseModel)
@@ -48,7 +49,9 @@ class LLMEngine(ABC):
         """
         pass
 
-    def query_object(self, response_model: type[T], **kwargs) -> T:
+    def query_object(
+        self, response_model: type[T], cache_prefix: str = None, **kwargs
+    ) -> T:
         """
         Query the LLM and parse the response into a specified object type.
 
@@ -58,6 +61,9 @@ class LLMEngine(ABC):
         Args:
             response_model (type[T]): The type of object to parse the response into. It
                                       should be a Pydantic BaseModel subclass.
+            cache_prefix (str, optional): Context shared by many queries. It is placed
+                                          at the start of the prompt so that providers
+                                          with prompt caching can reuse it.
             **kwargs: Arbitrary keyword arguments. Arguments with all-uppercase keys
                       will be passed to the LLM via the prompt. Others as LLM API
                       arguments.
@@ -74,18 +80,24 @@ class LLMEngine(ABC):
 
         try:
             response = self.query(
-                messages=generate_obj_query_messages(response_model, prompt_args),
+                messages=generate_obj_query_messages(
+                    response_model, prompt_args, cache_prefix
+                ),
                 **api_args,
             )
         except Exception:
             if self.fallback:
-                return self.fallback.query_object(response_model, **kwargs)
+                return self.fallback.query_object(
+                    response_model, cache_prefix=cache_prefix, **kwargs
+                )
             else:
                 raise
 
         return parse_obj_response(response_model, response)
 
-    def query_block(self, block_type: str, **kwargs) -> str:
+    def query_block(
+        self, block_type: str, cache_prefix: str = None, **kwargs
+    ) -> str:
         """
         Query the LLM for a specific block type and parse the response.
 
@@ -95,6 +107,9 @@ class LLMEngine(ABC):
 
         Args:
             block_type (str): The type of block to query for.
+            cache_prefix (str, optional): Context shared by many queries. It is placed
+                                          at the start of the prompt so that providers
+                                          with prompt caching can reuse it.
             **kwargs: Arbitrary keyword arguments. Arguments with all-uppercase keys
                       will be passed to the LLM via the prompt. Others as LLM API
                       arguments.
@@ -110,18 +125,22 @@ class LLMEngine(ABC):
 
         try:
             response = self.query(
-                messages=generate_block_query_messages(block_type, prompt_args),
+                messages=generate_block_query_messages(
+                    block_type, prompt_args, cache_prefix
+                ),
                 **api_args,
             )
         except Exception:
             if self.fallback:
-                return self.fallback.query_block(block_type, **kwargs)
+                return self.fallback.query_block(
+                    block_type, cache_prefix=cache_prefix, **kwargs
+                )
             else:
                 raise
 
         return parse_block_response(block_type, response)
 
-    def query_structured(self, structure: S, **kwargs):
+    def query_structured(self, structure: S, cache_prefix: str = None, **kwargs):
         """
         Query the LLM and parse the response into a specified structure.
 
@@ -132,6 +151,9 @@ class LLMEngine(ABC):
             structure (Union[str, BaseModel]): The structure to parse the response into,
                                                either a string for markdown block types
                                                or a Pydantic model for object types.
+            cache_prefix (str, optional): Context shared by many queries. It is placed
+                                          at the start of the prompt so that providers
+                                          with prompt caching can reuse it.
             **kwargs: Arbitrary keyword arguments. Arguments with all-uppercase keys
                       will be passed to the LLM via the prompt. Others as LLM API
                       arguments.
@@ -143,9 +165,9 @@ class LLMEngine(ABC):
             Exception: If the query fails and there's no fallback engine.
         """
         if isinstance(structure, str):
-            return self.query_block(structure, **kwargs)
+            return self.query_block(structure, cache_prefix=cache_prefix, **kwargs)
         elif issubclass(structure, BaseModel):
-            return self.query_object(structure, **kwargs)
+            return self.query_object(structure, cache_prefix=cache_prefix, **kwargs)
         else:
             raise ValueError(
                 f"Invalid structure type. Must be a string or a Pydantic model. Got: {type(structure)}"
@@ -169,10 +191,11 @@ class AsyncLLMEngine(ABC):
         query_object: Query the LLM and parse the response into a specified object
                       type.
         query_block: Query the LLM for a specific block type and parse the response.
+        aclose: Release the connections held by the engine.
 
     Usage:
         Subclass AsyncLLMEngine and implement the `query` method to use with a specific
-        LLM API.
+        LLM API. Override `aclose` if the engine holds connections.
 
         Use `query_object` to get responses parsed into pydantic object types.
         Use `query_block` to get responses for markdown block types.
@@ -189,6 +212,22 @@ class AsyncLLMEngine(ABC):
         """
         self.fallback = fallback
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Release the connections held by the engine and its fallback engine.
+
+        Engines can also be used as async context managers, which call this method
+        on exit.
+        """
+        if self.fallback:
+            await self.fallback.aclose()
+
     @abstractmethod
     async def query(self, **kwargs):
         """
@@ -202,7 +241,9 @@ class AsyncLLMEngine(ABC):
         """
         pass
 
-    async def query_object(self, response_model: type[T], **kwargs) -> T:
+    async def query_object(
+        self, response_model: type[T], cache_prefix: str = None, **kwargs
+    ) -> T:
         """
         Query the LLM and parse the response into a specified object type.
 
@@ -212,6 +253,9 @@ class AsyncLLMEngine(ABC):
         Args:
             response_model (type[T]): The type of object to parse the response into. It
                                       should be a Pydantic BaseModel subclass.
+            cache_prefix (str, optional): Context shared by many queries. It is placed
+                                          at the start of the prompt so that providers
+                                          with prompt caching can reuse it.
             **kwargs: Arbitrary keyword arguments. Arguments with all-uppercase keys
                       will be passed to the LLM via the prompt. Others as LLM API
                       arguments.
@@ -228,18 +272,24 @@ class AsyncLLMEngine(ABC):
 
         try:
             response = await self.query(
-                messages=generate_obj_query_messages(response_model, prompt_args),
+                messages=generate_obj_query_messages(
+                    response_model, prompt_args, cache_prefix
+                ),
                 **api_args,
             )
         except Exception:
             if self.fallback:
-                return await self.fallback.query_object(response_model, **kwargs)
+                return await self.fallback.query_object(
+                    response_model, cache_prefix=cache_prefix, **kwargs
+                )
             else:
                 raise
 
         return parse_obj_response(response_model, response)
 
-    async def query_block(self, block_type: str, **kwargs) -> T:
+    async def query_block(
+        self, block_type: str, cache_prefix: str = None, **kwargs
+    ) -> T:
         """
         Query the LLM for a specific block type and parse the response.
 
@@ -249,6 +299,9 @@ class AsyncLLMEngine(ABC):
 
         Args:
             block_type (str): The type of block to query for.
+            cache_prefix (str, optional): Context shared by many queries. It is placed
+                                          at the start of the prompt so that providers
+                                          with prompt caching can reuse it.
             **kwargs: Arbitrary keyword arguments. Arguments with all-uppercase keys
                       will be passed to the LLM via the prompt. Others as LLM API
                       arguments.
@@ -264,18 +317,24 @@ class AsyncLLMEngine(ABC):
 
         try:
             response = await self.query(
-                messages=generate_block_query_messages(block_type, prompt_args),
+                messages=generate_block_query_messages(
+                    block_type, prompt_args, cache_prefix
+                ),
                 **api_args,
             )
         except Exception:
             if self.fallback:
-                return await self.fallback.query_block(block_type, **kwargs)
+                return await self.fallback.query_block(
+                    block_type, cache_prefix=cache_prefix, **kwargs
+                )
             else:
                 raise
 
         return parse_block_response(block_type, response)
 
-    async def query_structured(self, structure: S, **kwargs) -> S:
+    async def query_structured(
+        self, structure: S, cache_prefix: str = None, **kwargs
+    ) -> S:
         """
         Query the LLM and parse the response into a specified structure.
 
@@ -286,6 +345,9 @@ class AsyncLLMEngine(ABC):
             structure (Union[str, BaseModel]): The structure to parse the response into,
                                                either a string for markdown block types
                                                or a Pydantic model for object types.
+            cache_prefix (str, optional): Context shared by many queries. It is placed
+                                          at the start of the prompt so that providers
+                                          with prompt caching can reuse it.
             **kwargs: Arbitrary keyword arguments. Arguments with all-uppercase keys
                       will be passed to the LLM via the prompt. Others as LLM API
                       arguments.
@@ -297,44 +359,47 @@ class AsyncLLMEngine(ABC):
             Exception: If the query fails and there's no fallback engine.
         """
         if isinstance(structure, str):
-            return await self.query_block(structure, **kwargs)
+            return await self.query_block(
+                structure, cache_prefix=cache_prefix, **kwargs
+            )
         elif issubclass(structure, BaseModel):
-            return await self.query_object(structure, **kwargs)
+            return await self.query_object(
+                structure, cache_prefix=cache_prefix, **kwargs
+            )
         else:
             raise ValueError(
                 f"Invalid structure type. Must be a string or a Pydantic model. Got: {type(structure)}"
             )
 
 
-def _normalize(obj):
+def _default(obj):
     """
-    Recursively normalize an object for serialization.
+    Convert objects that orjson can't serialize natively.
 
-    This function handles Pydantic BaseModel instances, dictionaries, and lists.
-    Other types are returned as-is.
+    orjson calls this for every such object it encounters, including those nested
+    in dictionaries and lists. Pydantic BaseModel instances are converted to
+    dictionaries.
 
     Args:
-        obj: The object to normalize.
+        obj: The object to convert.
 
     Returns:
-        The normalized version of the object.
+        The serializable version of the object.
+
+    Raises:
+        TypeError: If the object isn't supported.
     """
     if isinstance(obj, BaseModel):
         return obj.model_dump()
-    elif isinstance(obj, dict):
-        return {k: _normalize(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_normalize(v) for v in obj]
-    else:
-        return obj
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 def _serialize(obj):
     """
     Serialize an object to a JSON string.
 
-    This function first normalizes the object using _normalize(),
-    then serializes it to a JSON string with indentation.
+    The object is serialized with orjson, with indentation. Pydantic BaseModel
+    instances are handled through _default().
 
     Args:
         obj: The object to serialize.
@@ -342,7 +407,7 @@ def _serialize(obj):
     Returns:
         str: The JSON string representation of the object.
     """
-    return json.dumps(_normalize(obj), indent=2)
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2).decode()
 
 
 def compile_user_prompt(**kwargs):
@@ -365,12 +430,14 @@ def compile_user_prompt(**kwargs):
     return "\n\n".join(prompt_pieces)
 
 
+@functools.cache
 def _compile_system_prompt(response_model: type[BaseModel]):
     """
     Compile a system prompt for a given response model.
 
     This function creates a prompt instructing the model to return
-    a JSON object matching the schema of the provided response model.
+    a JSON object matching the schema of the provided response model. The prompt
+    is cached per response model, since its JSON schema never changes.
 
     Args:
         response_model (BaseModel): The Pydantic model to use for the response schema.
@@ -382,12 +449,33 @@ def _compile_system_prompt(response_model: type[BaseModel]):
     return (
         "Your task is to understand the content and provide "
         "the parsed objects in json that matches the following json_schema:\n\n"
-        f"{json.dumps(schema, indent=2)}\n\n"
+        f"{orjson.dumps(schema, option=orjson.OPT_INDENT_2).decode()}\n\n"
         "Make sure to return an instance of the JSON, not the schema itself."
     )
 
 
-def generate_obj_query_messages(response_model: type[BaseModel], prompt_args: dict):
+def _prepend_cache_prefix(system_prompt: str, cache_prefix: str = None):
+    """
+    Place the cache prefix at the start of the system prompt.
+
+    Providers that cache prompt prefixes can then reuse the shared context across
+    queries, even when the rest of the system prompt differs.
+
+    Args:
+        system_prompt (str): The query-specific system prompt.
+        cache_prefix (str, optional): Context shared by many queries.
+
+    Returns:
+        str: The system prompt, preceded by the cache prefix if there is one.
+    """
+    if cache_prefix is None:
+        return system_prompt
+    return f"{cache_prefix}\n\n{system_prompt}"
+
+
+def generate_obj_query_messages(
+    response_model: type[BaseModel], prompt_args: dict, cache_prefix: str = None
+):
     """
     Generate messages for an object query.
 
@@ -397,6 +485,8 @@ def generate_obj_query_messages(response_model: type[BaseModel], prompt_args: di
     Args:
         response_model (BaseModel): The expected response model.
         prompt_args: Arguments to include in the user prompt.
+        cache_prefix (str, optional): Context shared by many queries, placed at the
+                                      start of the system message.
 
     Returns:
         list: A list of message dictionaries for the LLM query.
@@ -405,7 +495,9 @@ def generate_obj_query_messages(response_model: type[BaseModel], prompt_args: di
         "\n\nReturn the correct JSON response within a ```json codeblock, not the "
         "JSON_SCHEMA. Use only fields specified by the JSON_SCHEMA and nothing else."
     )
-    system_prompt = _compile_system_prompt(response_model)
+    system_prompt = _prepend_cache_prefix(
+        _compile_system_prompt(response_model), cache_prefix
+    )
 
     return [
         {"role": "system", "content": system_prompt},
@@ -418,7 +510,8 @@ def parse_obj_response(response_model: type[BaseModel], content: str):
     Parse an object response from the LLM.
 
     This function extracts JSON from a code block in the response content
-    and constructs an instance of the response model from it.
+    and validates it directly into an instance of the response model, without
+    building an intermediate dictionary.
 
     Args:
         response_model (BaseModel): The expected response model class.
@@ -433,12 +526,13 @@ def parse_obj_response(response_model: type[BaseModel], content: str):
         json_start = content.find("```") + 3
 
     json_end = content.find("```", json_start)
-    obj = json.loads(content[json_start:json_end].strip())
 
-    return response_model(**obj)
+    return response_model.model_validate_json(content[json_start:json_end])
 
 
-def generate_block_query_messages(block_type: str, prompt_args):
+def generate_block_query_messages(
+    block_type: str, prompt_args, cache_prefix: str = None
+):
     """
     Generate messages for a block query.
 
@@ -448,15 +542,20 @@ def generate_block_query_messages(block_type: str, prompt_args):
     Args:
         block_type (str): The type of block to generate (e.g., "python", "sql").
         prompt_args: Arguments to include in the user prompt.
+        cache_prefix (str, optional): Context shared by many queries, placed at the
+                                      start of the system message.
 
     Returns:
         list: A list of message dictionaries for the LLM query.
     """
     prompt = compile_user_prompt(**prompt_args)
-    system_prompt = (
-        "Respond with a single fenced code block and nothing else. Provide "
-        f"the response within: ```{block_type}\ncontent\n```.\n\n"
-        f"The content should be {block_type}-formatted."
+    system_prompt = _prepend_cache_prefix(
+        (
+            "Respond with a single fenced code block and nothing else. Provide "
+            f"the response within: ```{block_type}\ncontent\n```.\n\n"
+            f"The content should be {block_type}-formatted."
+        ),
+        cache_prefix,
     )
 
     return [
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+import orjson
+
+from .base_engine import AsyncLLMEngine, LLMEngine
+
+
+def _cache_key(kwargs: dict):
+    """
+    Compute the cache key for a query.
+
+    Args:
+        kwargs (dict): The keyword arguments of the query, including the messages.
+
+    Returns:
+        bytes: A blake2b digest of the query arguments.
+    """
+    request = orjson.dumps(kwargs, default=str, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(request).digest()
+
+
+def _is_cacheable(kwargs: dict):
+    """
+    Check whether a query's response can be cached.
+
+    Sampled responses are expected to differ between queries, so only queries
+    without a temperature or with a temperature of 0 are cached.
+
+    Args:
+        kwargs (dict): The keyword arguments of the query.
+
+    Returns:
+        bool: True if the response can be cached.
+    """
+    return not kwargs.get("temperature")
+
+
+class CachedEngine(LLMEngine):
+    """
+    An LLMEngine that caches the responses of another LLMEngine.
+
+    Queries with identical messages and API arguments are answered from an in-memory
+    LRU cache instead of being sent to the LLM again.
+
+    Attributes:
+        engine (LLMEngine): The engine whose responses are cached.
+        maxsize (int): The maximum number of responses to keep.
+
+    Inherits from:
+        LLMEngine
+    """
+
+    def __init__(self, engine: LLMEngine, *args, maxsize: int = 4096, **kwargs):
+        """
+        Initialize the CachedEngine.
+
+        Args:
+            engine (LLMEngine): The engine whose responses are cached.
+            *args: Variable length argument list to pass to the parent constructor.
+            maxsize (int, optional): The maximum number of responses to keep.
+                                     Defaults to 4096.
+            **kwargs: Arbitrary keyword arguments to pass to the parent constructor.
+        """
+        super().__init__(*args, **kwargs)
+        self.engine = engine
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def query(self, **kwargs):
+        """
+        Send a query to the wrapped engine, unless its response is already cached.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments to pass to the wrapped engine.
+
+        Returns:
+            str: The content of the response.
+        """
+        if not _is_cacheable(kwargs):
+            return self.engine.query(**kwargs)
+
+        key = _cache_key(kwargs)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        response = self.engine.query(**kwargs)
+        self._cache[key] = response
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return response
+
+
+class AsyncCachedEngine(AsyncLLMEngine):
+    """
+    An AsyncLLMEngine that caches the responses of another AsyncLLMEngine.
+
+    Queries with identical messages and API arguments are answered from an in-memory
+    LRU cache instead of being sent to the LLM again. Identical queries that are in
+    flight at the same time share a single request.
+
+    Attributes:
+        engine (AsyncLLMEngine): The engine whose responses are cached.
+        maxsize (int): The maximum number of responses to keep.
+
+    Inherits from:
+        AsyncLLMEngine
+    """
+
+    def __init__(self, engine: AsyncLLMEngine, *args, maxsize: int = 4096, **kwargs):
+        """
+        Initialize the AsyncCachedEngine.
+
+        Args:
+            engine (AsyncLLMEngine): The engine whose responses are cached.
+            *args: Variable length argument list to pass to the parent constructor.
+            maxsize (int, optional): The maximum number of responses to keep.
+                                     Defaults to 4096.
+            **kwargs: Arbitrary keyword arguments to pass to the parent constructor.
+        """
+        super().__init__(*args, **kwargs)
+        self.engine = engine
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+    async def aclose(self):
+        """
+        Close the wrapped engine, along with the fallback engine.
+        """
+        await self.engine.aclose()
+        await super().aclose()
+
+    async def query(self, **kwargs):
+        """
+        Asynchronously send a query to the wrapped engine, unless its response is
+        already cached or being requested.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments to pass to the wrapped engine.
+
+        Returns:
+            str: The content of the response.
+        """
+        if not _is_cacheable(kwargs):
+            return await self.engine.query(**kwargs)
+
+        key = _cache_key(kwargs)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            future = self._cache[key]
+        else:
+            future = asyncio.ensure_future(self.engine.query(**kwargs))
+            future.add_done_callback(lambda f: self._evict_failure(key, f))
+            self._cache[key] = future
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+        # Shielded so that a cancelled query doesn't cancel the request for the
+        # other queries waiting on it
+        return await asyncio.shield(future)
+
+    def _evict_failure(self, key: bytes, future: asyncio.Future):
+        """
+        Remove a failed request from the cache so that later queries retry it.
+
+        Args:
+            key (bytes): The cache key of the request.
+            future (asyncio.Future): The finished request.
+        """
+        if future.cancelled() or future.exception() is not None:
+            if self._cache.get(key) is future:
+                del self._cache[key]
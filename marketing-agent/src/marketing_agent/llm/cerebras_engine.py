@@ -1,6 +1,48 @@
-from cerebras.cloud.sdk import AsyncCerebras, Cerebras
+import functools
+
+from cerebras.cloud.sdk import (
+    AsyncCerebras,
+    Cerebras,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+)
 
 from .base_engine import AsyncLLMEngine, LLMEngine
+from .http_limits import connection_limits
+
+
+@functools.cache
+def _client() -> Cerebras:
+    """
+    Get the Cerebras client shared by every CerebrasEngine.
+
+    Sharing the client lets the engines reuse its pooled connections. The pool is
+    sized by LLM_MAX_CONNECTIONS, if set.
+
+    Returns:
+        Cerebras: The shared Cerebras client.
+    """
+    limits = connection_limits()
+    if limits is None:
+        return Cerebras()
+    return Cerebras(http_client=DefaultHttpxClient(limits=limits))
+
+
+@functools.cache
+def _async_client() -> AsyncCerebras:
+    """
+    Get the asynchronous Cerebras client shared by every AsyncCerebrasEngine.
+
+    Sharing the client lets the engines reuse its pooled connections. The pool is
+    sized by LLM_MAX_CONNECTIONS, if set.
+
+    Returns:
+        AsyncCerebras: The shared asynchronous Cerebras client.
+    """
+    limits = connection_limits()
+    if limits is None:
+        return AsyncCerebras()
+    return AsyncCerebras(http_client=DefaultAsyncHttpxClient(limits=limits))
 
 
 class CerebrasEngine(LLMEngine):
@@ -11,7 +53,7 @@ class CerebrasEngine(LLMEngine):
 
     Attributes:
         model (str): The name of the Cerebras model to use.
-        client (Cerebras): An instance of the Cerebras client for API interactions.
+        client (Cerebras): The shared Cerebras client for API interactions.
 
     Inherits from:
         LLMEngine
@@ -28,7 +70,7 @@ class CerebrasEngine(LLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = Cerebras()
+        self.client = _client()
 
     def query(self, **kwargs):
         """
@@ -55,7 +97,7 @@ class AsyncCerebrasEngine(AsyncLLMEngine):
 
     Attributes:
         model (str): The name of the Cerebras model to use.
-        client (AsyncCerebras): An instance of the asynchronous Cerebras client for API interactions.
+        client (AsyncCerebras): The shared asynchronous Cerebras client for API interactions.
 
     Inherits from:
         AsyncLLMEngine
@@ -72,7 +114,18 @@ class AsyncCerebrasEngine(AsyncLLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = AsyncCerebras()
+        self.client = _async_client()
+
+    async def aclose(self):
+        """
+        Close the shared Cerebras client, along with the fallback engine.
+
+        The client is shared by every AsyncCerebrasEngine, so only close it once all
+        of them are done. Engines created afterwards get a new client.
+        """
+        await self.client.close()
+        _async_client.cache_clear()
+        await super().aclose()
 
     async def query(self, **kwargs):
         """
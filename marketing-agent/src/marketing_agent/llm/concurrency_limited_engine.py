@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+from .base_engine import AsyncLLMEngine, LLMEngine
+
+
+class ConcurrencyLimitedEngine(LLMEngine):
+    """
+    An LLMEngine that bounds the number of queries in flight to another LLMEngine.
+
+    Queries made while max_inflight queries are already in flight wait for one of
+    them to finish, so that callers running in many threads don't open more
+    connections than the provider accepts.
+
+    Attributes:
+        engine (LLMEngine): The engine whose queries are bounded.
+        max_inflight (int): The maximum number of queries in flight.
+
+    Inherits from:
+        LLMEngine
+    """
+
+    def __init__(self, engine: LLMEngine, max_inflight: int, *args, **kwargs):
+        """
+        Initialize the ConcurrencyLimitedEngine.
+
+        Args:
+            engine (LLMEngine): The engine whose queries are bounded.
+            max_inflight (int): The maximum number of queries in flight.
+            *args: Variable length argument list to pass to the parent constructor.
+            **kwargs: Arbitrary keyword arguments to pass to the parent constructor.
+        """
+        super().__init__(*args, **kwargs)
+        self.engine = engine
+        self.max_inflight = max_inflight
+        self._semaphore = threading.BoundedSemaphore(max_inflight)
+
+    def query(self, **kwargs):
+        """
+        Send a query to the wrapped engine once fewer than max_inflight queries are
+        in flight.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments to pass to the wrapped engine.
+
+        Returns:
+            str: The content of the response.
+        """
+        with self._semaphore:
+            return self.engine.query(**kwargs)
+
+
+class AsyncConcurrencyLimitedEngine(AsyncLLMEngine):
+    """
+    An AsyncLLMEngine that bounds the number of queries in flight to another
+    AsyncLLMEngine.
+
+    Queries made while max_inflight queries are already in flight wait for one of
+    them to finish. This keeps a campaign that fans out to many channels from
+    opening more connections than the provider accepts, while still keeping
+    max_inflight requests queued at the provider.
+
+    Attributes:
+        engine (AsyncLLMEngine): The engine whose queries are bounded.
+        max_inflight (int): The maximum number of queries in flight.
+
+    Inherits from:
+        AsyncLLMEngine
+    """
+
+    def __init__(self, engine: AsyncLLMEngine, max_inflight: int, *args, **kwargs):
+        """
+        Initialize the AsyncConcurrencyLimitedEngine.
+
+        Args:
+            engine (AsyncLLMEngine): The engine whose queries are bounded.
+            max_inflight (int): The maximum number of queries in flight.
+            *args: Variable length argument list to pass to the parent constructor.
+            **kwargs: Arbitrary keyword arguments to pass to the parent constructor.
+        """
+        super().__init__(*args, **kwargs)
+        self.engine = engine
+        self.max_inflight = max_inflight
+        self._semaphore = asyncio.Semaphore(max_inflight)
+
+    async def aclose(self):
+        """
+        Close the wrapped engine, along with the fallback engine.
+        """
+        await self.engine.aclose()
+        await super().aclose()
+
+    async def query(self, **kwargs):
+        """
+        Asynchronously send a query to the wrapped engine once fewer than
+        max_inflight queries are in flight.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments to pass to the wrapped engine.
+
+        Returns:
+            str: The content of the response.
+        """
+        async with self._semaphore:
+            return await self.engine.query(**kwargs)
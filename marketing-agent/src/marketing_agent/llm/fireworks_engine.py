@@ -1,8 +1,36 @@
+import functools
+
 from fireworks.client import AsyncFireworks, Fireworks
 
 from .base_engine import AsyncLLMEngine, LLMEngine
 
 
+@functools.cache
+def _client() -> Fireworks:
+    """
+    Get the Fireworks client shared by every FireworksEngine.
+
+    Sharing the client lets the engines reuse its pooled connections.
+
+    Returns:
+        Fireworks: The shared Fireworks client.
+    """
+    return Fireworks()
+
+
+@functools.cache
+def _async_client() -> AsyncFireworks:
+    """
+    Get the asynchronous Fireworks client shared by every AsyncFireworksEngine.
+
+    Sharing the client lets the engines reuse its pooled connections.
+
+    Returns:
+        AsyncFireworks: The shared asynchronous Fireworks client.
+    """
+    return AsyncFireworks()
+
+
 class FireworksEngine(LLMEngine):
     """
     A concrete implementation of LLMEngine for interacting with Fireworks models.
@@ -11,7 +39,7 @@ class FireworksEngine(LLMEngine):
 
     Attributes:
         model (str): The name of the Fireworks model to use.
-        client (Fireworks): An instance of the Fireworks client for API interactions.
+        client (Fireworks): The shared Fireworks client for API interactions.
 
     Inherits from:
         LLMEngine
@@ -28,7 +56,7 @@ class FireworksEngine(LLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = Fireworks()
+        self.client = _client()
 
     def query(self, **kwargs):
         """
@@ -57,7 +85,7 @@ class AsyncFireworksEngine(AsyncLLMEngine):
 
     Attributes:
         model (str): The name of the Fireworks model to use.
-        client (AsyncFireworks): An instance of the asynchronous Fireworks client for API interactions.
+        client (AsyncFireworks): The shared asynchronous Fireworks client for API interactions.
 
     Inherits from:
         AsyncLLMEngine
@@ -74,7 +102,18 @@ class AsyncFireworksEngine(AsyncLLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = AsyncFireworks()
+        self.client = _async_client()
+
+    async def aclose(self):
+        """
+        Close the shared Fireworks client, along with the fallback engine.
+
+        The client is shared by every AsyncFireworksEngine, so only close it once all
+        of them are done. Engines created afterwards get a new client.
+        """
+        await self.client.aclose()
+        _async_client.cache_clear()
+        await super().aclose()
 
     async def query(self, **kwargs):
         """
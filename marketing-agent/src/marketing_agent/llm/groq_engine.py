@@ -1,6 +1,48 @@
-from groq import AsyncGroq, Groq
+import functools
+
+from groq import (
+    AsyncGroq,
+    Groq,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+)
 
 from .base_engine import AsyncLLMEngine, LLMEngine
+from .http_limits import connection_limits
+
+
+@functools.cache
+def _client() -> Groq:
+    """
+    Get the Groq client shared by every GroqEngine.
+
+    Sharing the client lets the engines reuse its pooled connections. The pool is
+    sized by LLM_MAX_CONNECTIONS, if set.
+
+    Returns:
+        Groq: The shared Groq client.
+    """
+    limits = connection_limits()
+    if limits is None:
+        return Groq()
+    return Groq(http_client=DefaultHttpxClient(limits=limits))
+
+
+@functools.cache
+def _async_client() -> AsyncGroq:
+    """
+    Get the asynchronous Groq client shared by every AsyncGroqEngine.
+
+    Sharing the client lets the engines reuse its pooled connections. The pool is
+    sized by LLM_MAX_CONNECTIONS, if set.
+
+    Returns:
+        AsyncGroq: The shared asynchronous Groq client.
+    """
+    limits = connection_limits()
+    if limits is None:
+        return AsyncGroq()
+    return AsyncGroq(http_client=DefaultAsyncHttpxClient(limits=limits))
 
 
 class GroqEngine(LLMEngine):
@@ -11,7 +53,7 @@ class GroqEngine(LLMEngine):
 
     Attributes:
         model (str): The name of the Groq model to use.
-        client (Groq): An instance of the Groq client for API interactions.
+        client (Groq): The shared Groq client for API interactions.
 
     Inherits from:
         LLMEngine
@@ -28,7 +70,7 @@ class GroqEngine(LLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = Groq()
+        self.client = _client()
 
     def query(self, **kwargs):
         """
@@ -57,7 +99,7 @@ class AsyncGroqEngine(AsyncLLMEngine):
 
     Attributes:
         model (str): The name of the Groq model to use.
-        client (AsyncGroq): An instance of the asynchronous Groq client for API interactions.
+        client (AsyncGroq): The shared asynchronous Groq client for API interactions.
 
     Inherits from:
         AsyncLLMEngine
@@ -74,7 +116,18 @@ class AsyncGroqEngine(AsyncLLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = AsyncGroq()
+        self.client = _async_client()
+
+    async def aclose(self):
+        """
+        Close the shared Groq client, along with the fallback engine.
+
+        The client is shared by every AsyncGroqEngine, so only close it once all
+        of them are done. Engines created afterwards get a new client.
+        """
+        await self.client.close()
+        _async_client.cache_clear()
+        await super().aclose()
 
     async def query(self, **kwargs):
         """
@@ -0,0 +1,43 @@
+import os
+from typing import Optional
+
+import httpx
+
+
+def _int_env(name: str) -> Optional[int]:
+    """
+    Read an integer from an environment variable.
+
+    Args:
+        name (str): The name of the environment variable.
+
+    Returns:
+        Optional[int]: The value of the variable, or None if it's unset or empty.
+    """
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+# Connection pool size of the providers' HTTP clients. Unset to keep each client's
+# default pool.
+MAX_CONNECTIONS = _int_env("LLM_MAX_CONNECTIONS")
+# Number of idle connections kept open. Defaults to MAX_CONNECTIONS.
+MAX_KEEPALIVE_CONNECTIONS = _int_env("LLM_MAX_KEEPALIVE")
+# Number of seconds an idle connection is kept open
+KEEPALIVE_EXPIRY = 30
+
+
+def connection_limits() -> Optional[httpx.Limits]:
+    """
+    Get the configured connection pool limits for the providers' HTTP clients.
+
+    Returns:
+        Optional[httpx.Limits]: The limits, or None if LLM_MAX_CONNECTIONS isn't set.
+    """
+    if MAX_CONNECTIONS is None:
+        return None
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS or MAX_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
@@ -1,7 +1,95 @@
+import asyncio
+import functools
+import logging
 import os
+import random
+import time
+
 import httpx
 
 from .base_engine import AsyncLLMEngine, LLMEngine
+from .http_limits import connection_limits
+
+logger = logging.getLogger(__name__)
+
+_BASE_URL = "https://api.perplexity.ai"
+# Online models search the web before answering, so responses can take a while
+_TIMEOUT = httpx.Timeout(120.0)
+# Connection pool limits, unless LLM_MAX_CONNECTIONS is set
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+# Number of times a request that failed with a transient error is retried
+MAX_RETRIES = 3
+# HTTP status codes of transient errors: timeouts, rate limits and server errors
+_RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _is_transient(error: httpx.HTTPError) -> bool:
+    """
+    Check whether a failed request is worth retrying.
+
+    Args:
+        error (httpx.HTTPError): The error raised by the request.
+
+    Returns:
+        bool: True for network errors and transient HTTP status codes.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in _RETRY_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def _backoff(attempt: int) -> float:
+    """
+    Compute how long to wait before retrying a request.
+
+    The delay is drawn at random up to an exponentially growing bound, so that
+    requests that failed together don't retry together.
+
+    Args:
+        attempt (int): The number of attempts that already failed, minus one.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    return random.uniform(0, min(30, 2 ** (attempt + 1)))
+
+
+@functools.cache
+def _client() -> httpx.Client:
+    """
+    Get the HTTP client shared by every PerplexityEngine.
+
+    Sharing the client lets the engines reuse its pooled connections.
+
+    Returns:
+        httpx.Client: The shared HTTP client.
+    """
+    return httpx.Client(
+        base_url=_BASE_URL,
+        timeout=_TIMEOUT,
+        limits=connection_limits() or _LIMITS,
+        http2=True,
+    )
+
+
+@functools.cache
+def _async_client() -> httpx.AsyncClient:
+    """
+    Get the asynchronous HTTP client shared by every AsyncPerplexityEngine.
+
+    Sharing the client lets the engines reuse its pooled connections instead of
+    opening a new connection for every query. With HTTP/2, concurrent queries are
+    multiplexed over the same connection.
+
+    Returns:
+        httpx.AsyncClient: The shared asynchronous HTTP client.
+    """
+    return httpx.AsyncClient(
+        base_url=_BASE_URL,
+        timeout=_TIMEOUT,
+        limits=connection_limits() or _LIMITS,
+        http2=True,
+    )
 
 
 class PerplexityEngine(LLMEngine):
@@ -13,6 +101,7 @@ class PerplexityEngine(LLMEngine):
     Attributes:
         model (str): The name of the Perplexity AI model to use.
         apikey (str): The API key for authenticating with Perplexity AI, retrieved from environment variables.
+        headers (dict): The HTTP headers sent with every query.
 
     Inherits from:
         LLMEngine
@@ -30,6 +119,13 @@ class PerplexityEngine(LLMEngine):
         super().__init__(*args, **kwargs)
         self.model = model
         self.apikey = os.environ["PERPLEXITY_API_KEY"]
+        self.headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "authorization": f"Bearer {self.apikey}",
+        }
+        # Fields sent with every query, before the query's own arguments
+        self._base_payload = {"model": self.model, "return_citations": True}
 
     def query(self, **kwargs):
         """
@@ -47,20 +143,20 @@ class PerplexityEngine(LLMEngine):
         Raises:
             httpx.HTTPError: If there's an issue with the HTTP request.
         """
-        url = "https://api.perplexity.ai/chat/completions"
-
-        payload = {
-            "model": self.model,
-            "return_citations": True,
-            **kwargs,
-        }
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.apikey}",
-        }
-
-        response = httpx.post(url, json=payload, headers=headers)
+        payload = {**self._base_payload, **kwargs}
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = _client().post(
+                    "/chat/completions", json=payload, headers=self.headers
+                )
+                response.raise_for_status()
+                break
+            except httpx.HTTPError as e:
+                if attempt == MAX_RETRIES or not _is_transient(e):
+                    raise
+                logger.warning("Retrying Perplexity request after error: %s", e)
+                time.sleep(_backoff(attempt))
 
         content = response.json()["choices"][0]["message"]["content"]
         return content
@@ -75,6 +171,7 @@ class AsyncPerplexityEngine(AsyncLLMEngine):
     Attributes:
         model (str): The name of the Perplexity AI model to use.
         apikey (str): The API key for authenticating with Perplexity AI, retrieved from environment variables.
+        headers (dict): The HTTP headers sent with every query.
 
     Inherits from:
         AsyncLLMEngine
@@ -92,6 +189,25 @@ class AsyncPerplexityEngine(AsyncLLMEngine):
         super().__init__(*args, **kwargs)
         self.model = model
         self.apikey = os.environ["PERPLEXITY_API_KEY"]
+        self.headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "authorization": f"Bearer {self.apikey}",
+        }
+        # Fields sent with every query, before the query's own arguments
+        self._base_payload = {"model": self.model, "return_citations": True}
+
+    async def aclose(self):
+        """
+        Close the shared HTTP client, along with the fallback engine.
+
+        The client is shared by every AsyncPerplexityEngine, so only close it once
+        all of them are done. Engines created afterwards get a new client.
+        """
+        if _async_client.cache_info().currsize:
+            await _async_client().aclose()
+            _async_client.cache_clear()
+        await super().aclose()
 
     async def query(self, **kwargs):
         """
@@ -110,23 +226,19 @@ class AsyncPerplexityEngine(AsyncLLMEngine):
             httpx.HTTPError: If there's an issue with the HTTP request.
             KeyError: If the expected data is not found in the API response.
         """
-        url = "https://api.perplexity.ai/chat/completions"
-
-        payload = {
-            "model": self.model,
-            "return_citations": True,
-            **kwargs,
-        }
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.apikey}",
-        }
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url, json=payload, headers=headers, timeout=None
-            )
+        payload = {**self._base_payload, **kwargs}
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = await _async_client().post(
+                    "/chat/completions", json=payload, headers=self.headers
+                )
+                response.raise_for_status()
+                break
+            except httpx.HTTPError as e:
+                if attempt == MAX_RETRIES or not _is_transient(e):
+                    raise
+                logger.warning("Retrying Perplexity request after error: %s", e)
+                await asyncio.sleep(_backoff(attempt))
 
         content = response.json()["choices"][0]["message"]["content"]
         return content
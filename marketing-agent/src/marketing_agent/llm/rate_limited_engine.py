@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+
+from .base_engine import AsyncLLMEngine, LLMEngine
+
+
+class _TokenBucket:
+    """
+    Tracks how many requests may be sent right now under a requests-per-minute limit.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        burst (int): The maximum number of tokens that can accumulate.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int):
+        """
+        Initialize the _TokenBucket.
+
+        Args:
+            requests_per_minute (float): The sustained number of requests per minute.
+            burst (int): The maximum number of requests that can be sent back to back.
+        """
+        self.rate = requests_per_minute / 60
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def take(self):
+        """
+        Take a token from the bucket.
+
+        Returns:
+            float: The number of seconds to wait before sending the request. The token
+                   is considered taken once the wait is over.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / self.rate
+
+
+class RateLimitedEngine(LLMEngine):
+    """
+    An LLMEngine that paces the queries sent to another LLMEngine.
+
+    Queries are spread out so that no more than requests_per_minute are sent on
+    average, instead of being sent in bursts that the provider answers with rate
+    limit errors.
+
+    Attributes:
+        engine (LLMEngine): The engine whose queries are paced.
+
+    Inherits from:
+        LLMEngine
+    """
+
+    def __init__(
+        self,
+        engine: LLMEngine,
+        requests_per_minute: float,
+        *args,
+        burst: int = 1,
+        **kwargs,
+    ):
+        """
+        Initialize the RateLimitedEngine.
+
+        Args:
+            engine (LLMEngine): The engine whose queries are paced.
+            requests_per_minute (float): The sustained number of queries per minute.
+            *args: Variable length argument list to pass to the parent constructor.
+            burst (int, optional): The number of queries that can be sent back to back
+                                   after a quiet period. Defaults to 1.
+            **kwargs: Arbitrary keyword arguments to pass to the parent constructor.
+        """
+        super().__init__(*args, **kwargs)
+        self.engine = engine
+        self._bucket = _TokenBucket(requests_per_minute, burst)
+        self._lock = threading.Lock()
+
+    def query(self, **kwargs):
+        """
+        Send a query to the wrapped engine once the rate limit allows it.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments to pass to the wrapped engine.
+
+        Returns:
+            str: The content of the response.
+        """
+        with self._lock:
+            delay = self._bucket.take()
+        time.sleep(delay)
+        return self.engine.query(**kwargs)
+
+
+class AsyncRateLimitedEngine(AsyncLLMEngine):
+    """
+    An AsyncLLMEngine that paces the queries sent to another AsyncLLMEngine.
+
+    Queries are spread out so that no more than requests_per_minute are sent on
+    average, instead of being sent in bursts that the provider answers with rate
+    limit errors. Waiting queries are sent in the order they were made.
+
+    Attributes:
+        engine (AsyncLLMEngine): The engine whose queries are paced.
+
+    Inherits from:
+        AsyncLLMEngine
+    """
+
+    def __init__(
+        self,
+        engine: AsyncLLMEngine,
+        requests_per_minute: float,
+        *args,
+        burst: int = 1,
+        **kwargs,
+    ):
+        """
+        Initialize the AsyncRateLimitedEngine.
+
+        Args:
+            engine (AsyncLLMEngine): The engine whose queries are paced.
+            requests_per_minute (float): The sustained number of queries per minute.
+            *args: Variable length argument list to pass to the parent constructor.
+            burst (int, optional): The number of queries that can be sent back to back
+                                   after a quiet period. Defaults to 1.
+            **kwargs: Arbitrary keyword arguments to pass to the parent constructor.
+        """
+        super().__init__(*args, **kwargs)
+        self.engine = engine
+        self._bucket = _TokenBucket(requests_per_minute, burst)
+
+    async def aclose(self):
+        """
+        Close the wrapped engine, along with the fallback engine.
+        """
+        await self.engine.aclose()
+        await super().aclose()
+
+    async def query(self, **kwargs):
+        """
+        Asynchronously send a query to the wrapped engine once the rate limit allows it.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments to pass to the wrapped engine.
+
+        Returns:
+            str: The content of the response.
+        """
+        # Taking the token reserves this query's slot, so later queries wait behind it
+        await asyncio.sleep(self._bucket.take())
+        return await self.engine.query(**kwargs)
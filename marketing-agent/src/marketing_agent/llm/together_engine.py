@@ -1,8 +1,36 @@
+import functools
+
 from together import AsyncTogether, Together
 
 from .base_engine import AsyncLLMEngine, LLMEngine
 
 
+@functools.cache
+def _client() -> Together:
+    """
+    Get the Together client shared by every TogetherEngine.
+
+    Sharing the client lets the engines reuse its pooled connections.
+
+    Returns:
+        Together: The shared Together client.
+    """
+    return Together()
+
+
+@functools.cache
+def _async_client() -> AsyncTogether:
+    """
+    Get the asynchronous Together client shared by every AsyncTogetherEngine.
+
+    Sharing the client lets the engines reuse its pooled connections.
+
+    Returns:
+        AsyncTogether: The shared asynchronous Together client.
+    """
+    return AsyncTogether()
+
+
 class TogetherEngine(LLMEngine):
     """
     A concrete implementation of LLMEngine for interacting with Together models.
@@ -11,7 +39,7 @@ class TogetherEngine(LLMEngine):
 
     Attributes:
         model (str): The name of the Together model to use.
-        client (Together): An instance of the Together client for API interactions.
+        client (Together): The shared Together client for API interactions.
 
     Inherits from:
         LLMEngine
@@ -28,7 +56,7 @@ class TogetherEngine(LLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = Together()
+        self.client = _client()
 
     def query(self, **kwargs):
         """
@@ -57,7 +85,7 @@ class AsyncTogetherEngine(AsyncLLMEngine):
 
     Attributes:
         model (str): The name of the Together model to use.
-        client (AsyncTogether): An instance of the asynchronous Together client for API interactions.
+        client (AsyncTogether): The shared asynchronous Together client for API interactions.
 
     Inherits from:
         AsyncLLMEngine
@@ -74,7 +102,7 @@ class AsyncTogetherEngine(AsyncLLMEngine):
         """
         super().__init__(*args, **kwargs)
         self.model = model
-        self.client = AsyncTogether()
+        self.client = _async_client()
 
     async def query(self, **kwargs):
         """
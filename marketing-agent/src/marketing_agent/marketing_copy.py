@@ -1,11 +1,17 @@
 from typing import List, Optional, Union
 
-import yaml
 from pydantic import BaseModel
 
 from .copy_plugins.globals import copy_plugins
 from .datatypes import Audience, Channel, CopyStrategy, ProductAngle
-from .llm.base_engine import AsyncLLMEngine
+from .llm.base_engine import AsyncLLMEngine, compile_user_prompt
+
+
+# Response of the evaluation query in `CopyPiece.improve`
+class _Evaluation(BaseModel):
+    pros: List[str]
+    cons: List[str]
+    suggestions: List[str]
 
 
 class CopyPiece:
@@ -48,7 +54,9 @@ class CopyPiece:
             ValueError: If the channel's copy type is not supported.
         """
 
-        if channel.copy_format not in copy_plugins:
+        # Retrieve the copy classes based on the channel's copy format
+        copy_classes = copy_plugins.get(channel.copy_format)
+        if copy_classes is None:
             raise ValueError(f"Copy type not supported for {channel.copy_format}")
 
         self._llm = llm
@@ -60,13 +68,24 @@ class CopyPiece:
         self.metadata = None
         self.content = None
 
-        # Retrieve the copy classes based on the channel's copy format
-        copy_classes = copy_plugins[channel.copy_format]
-
         self._copy_class_name = copy_classes.name
         self._metadata_class = copy_classes.metadata_class
         self._content_class = copy_classes.content_class
 
+        # Context shared by every query for this copy. It's passed as a cache prefix
+        # so that providers with prompt caching can reuse it across queries.
+        self._cache_prefix = compile_user_prompt(
+            PRODUCT_DESCRIPTION=product,
+            PROBLEM_STATEMENT=angle.problem_addressed,
+            VALUE_PROPOSITION=angle.value_proposition,
+            USAGE=angle.usage,
+            AUDIENCE_PROFILE=audience.profile,
+            DEMOGRAPHICS=audience.demographics,
+            STRATEGY=copy_strategy.strategy,
+            PRODUCT_POSITIONING=copy_strategy.product_positioning,
+            COMPETITIVE_CLAIM=copy_strategy.competitive_claim,
+        )
+
     async def initialize(self):
         """
         Asynchronously generate initial metadata and content for the copy.
@@ -80,13 +99,7 @@ class CopyPiece:
         # Generate the metadata
         metadata = await self._llm.query_structured(
             self._metadata_class,
-            PROBLEM_STATEMENT=self._angle.problem_addressed,
-            VALUE_PROPOSITION=self._angle.value_proposition,
-            AUDIENCE_PROFILE=self._audience.profile,
-            DEMOGRAPHICS=yaml.dump(self._audience.demographics),
-            STRATEGY=self._strategy.strategy,
-            PRODUCT_POSITIONING=self._strategy.product_positioning,
-            COMPETITIVE_CLAIM=self._strategy.competitive_claim,
+            cache_prefix=self._cache_prefix,
             TASK=(
                 f"Generate a {self._copy_class_name} for the PROBLEM_STATEMENT and "
                 "VALUE_PROPOSITION targeting the AUDIENCE_PROFILE with "
@@ -94,22 +107,11 @@ class CopyPiece:
             ),
         )
 
-        if isinstance(metadata, str):
-            metadata_string = metadata
-        elif isinstance(metadata, BaseModel):
-            metadata_string = yaml.dump(metadata.model_dump())
-
         # Generate the content
         content = await self._llm.query_structured(
             self._content_class,
-            PROBLEM_STATEMENT=self._angle.problem_addressed,
-            VALUE_PROPOSITION=self._angle.value_proposition,
-            AUDIENCE_PROFILE=self._audience.profile,
-            DEMOGRAPHICS=yaml.dump(self._audience.demographics),
-            STRATEGY=self._strategy.strategy,
-            PRODUCT_POSITIONING=self._strategy.product_positioning,
-            COMPETITIVE_CLAIM=self._strategy.competitive_claim,
-            METADATA=metadata_string,
+            cache_prefix=self._cache_prefix,
+            METADATA=metadata,
             TASK=(
                 f"Generate a {self._copy_class_name} with METADATA for the PROBLEM_STATEMENT "
                 "and VALUE_PROPOSITION targeting the AUDIENCE_PROFILE with the "
@@ -130,14 +132,9 @@ class CopyPiece:
         The improved metadata and content replace the existing ones in the instance attributes.
         """
 
-        class Evaluation(BaseModel):
-            pros: List[str]
-            cons: List[str]
-            suggestions: List[str]
-
         evaluation = await self._llm.query_object(
-            Evaluation,
-            PRODUCT=self._product,
+            _Evaluation,
+            cache_prefix=self._cache_prefix,
             METADATA=self.metadata,
             CONTENT=self.content,
             TASK=(
@@ -150,13 +147,7 @@ class CopyPiece:
         # Generate the updated metadata
         metadata = await self._llm.query_structured(
             self._metadata_class,
-            PROBLEM_STATEMENT=self._angle.problem_addressed,
-            VALUE_PROPOSITION=self._angle.value_proposition,
-            AUDIENCE_PROFILE=self._audience.profile,
-            DEMOGRAPHICS=yaml.dump(self._audience.demographics),
-            STRATEGY=self._strategy.strategy,
-            PRODUCT_POSITIONING=self._strategy.product_positioning,
-            COMPETITIVE_CLAIM=self._strategy.competitive_claim,
+            cache_prefix=self._cache_prefix,
             METADATA=self.metadata,
             EVALUATION=evaluation,
             TASK=(
@@ -165,22 +156,11 @@ class CopyPiece:
             ),
         )
 
-        if isinstance(metadata, str):
-            metadata_string = metadata
-        elif isinstance(metadata, BaseModel):
-            metadata_string = yaml.dump(metadata.model_dump())
-
         # Generate the updated content
         content = await self._llm.query_structured(
             self._content_class,
-            PROBLEM_STATEMENT=self._angle.problem_addressed,
-            VALUE_PROPOSITION=self._angle.value_proposition,
-            AUDIENCE_PROFILE=self._audience.profile,
-            DEMOGRAPHICS=yaml.dump(self._audience.demographics),
-            STRATEGY=self._strategy.strategy,
-            PRODUCT_POSITIONING=self._strategy.product_positioning,
-            COMPETITIVE_CLAIM=self._strategy.competitive_claim,
-            METADATA=metadata_string,
+            cache_prefix=self._cache_prefix,
+            METADATA=metadata,
             CONTENT=self.content,
             EVALUATION=evaluation,
             TASK=(